@@ -28,27 +28,70 @@ methods for details.
 """
 
 __all__ = [
+    "ExtendedScenarios",
+    "ScenarioId",
+    "ScenarioTable",
     "TestWithScenarios",
+    "UnavailableModule",
     "WithScenarios",
     "apply_scenario",
     "apply_scenarios",
+    "deduplicate_scenarios",
     "generate_scenarios",
     "load_tests_apply_scenarios",
     "multiply_scenarios",
+    "parse_scenario_id",
     "per_module_scenarios",
+    "sample_multiply_scenarios",
+    "sample_scenarios",
+    "scenario_id",
+    "shared",
+    "shared_file",
+    "write_scenario_table",
     "__version__",
 ]
 
+import importlib
+
+# Public names are imported from their modules on first use, so that
+# importing testscenarios itself stays cheap.
+_lazy_imports = {
+    "ExtendedScenarios": "testscenarios.scenarios",
+    "ScenarioId": "testscenarios.ids",
+    "ScenarioTable": "testscenarios.scenarios",
+    "TestWithScenarios": "testscenarios.testcase",
+    "UnavailableModule": "testscenarios.scenarios",
+    "WithScenarios": "testscenarios.testcase",
+    "apply_scenario": "testscenarios.scenarios",
+    "apply_scenarios": "testscenarios.scenarios",
+    "deduplicate_scenarios": "testscenarios.scenarios",
+    "generate_scenarios": "testscenarios.scenarios",
+    "load_tests_apply_scenarios": "testscenarios.scenarios",
+    "multiply_scenarios": "testscenarios.scenarios",
+    "parse_scenario_id": "testscenarios.ids",
+    "per_module_scenarios": "testscenarios.scenarios",
+    "sample_multiply_scenarios": "testscenarios.scenarios",
+    "sample_scenarios": "testscenarios.scenarios",
+    "scenario_id": "testscenarios.ids",
+    "shared": "testscenarios.parameters",
+    "shared_file": "testscenarios.parameters",
+    "write_scenario_table": "testscenarios.scenarios",
+}
+
+
+def __getattr__(name):
+    if name in ("__version__", "version"):
+        _load_version()
+    elif name in _lazy_imports:
+        module = importlib.import_module(_lazy_imports[name])
+        globals()[name] = getattr(module, name)
+    else:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    return globals()[name]
+
 
-from testscenarios.scenarios import (  # noqa: E402
-    apply_scenario,
-    apply_scenarios,
-    generate_scenarios,
-    load_tests_apply_scenarios,
-    multiply_scenarios,
-    per_module_scenarios,
-)
-from testscenarios.testcase import TestWithScenarios, WithScenarios  # noqa: E402
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_imports) | {"__version__", "version"})
 
 
 def test_suite():
@@ -98,15 +141,23 @@ def __get_git_version():
 # established at this point, and setup.py will use a version of next-$(revno).
 # If the releaselevel is 'final', then the tarball will be major.minor.micro.
 # Otherwise it is major.minor.micro~$(revno).
+#
+# The version is only worked out when __version__ or version is first looked
+# up, as without an installed _version module that means running git.
 
-try:
-    from ._version import __version__, version
-except ModuleNotFoundError:
-    # package is not installed
-    if version := __get_git_version():
-        # we're in a git repo
-        __version__ = tuple([int(v) if v.isdigit() else v for v in version.split(".")])
-    else:
-        # we're working with a tarball or similar
-        version = "0.0.0"
-        __version__ = (0, 0, 0)
+
+def _load_version():
+    global __version__, version
+    try:
+        from ._version import __version__, version
+    except ModuleNotFoundError:
+        # package is not installed
+        if version := __get_git_version():
+            # we're in a git repo
+            __version__ = tuple(
+                [int(v) if v.isdigit() else v for v in version.split(".")]
+            )
+        else:
+            # we're working with a tarball or similar
+            version = "0.0.0"
+            __version__ = (0, 0, 0)
@@ -0,0 +1,262 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+"""Micro-benchmarks comparing scenarios."""
+
+__all__ = [
+    "BenchmarkStats",
+    "BenchmarkWithScenarios",
+    "TestBenchmarkWithScenarios",
+    "format_comparison",
+]
+
+import functools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import unittest
+
+from testscenarios.ids import scenario_id
+from testscenarios.scenarios import generate_scenarios
+from testscenarios.testcase import WithScenarios
+
+
+class BenchmarkStats:
+    """Timings of one benchmarked test.
+
+    :ivar samples: The time per call of the test body, in seconds, for each
+        sample taken.
+    :ivar iterations: The number of calls timed for each sample.
+    """
+
+    def __init__(self, samples, iterations):
+        self.samples = samples
+        self.iterations = iterations
+
+    @property
+    def median(self):
+        return statistics.median(self.samples)
+
+    @property
+    def iqr(self):
+        if len(self.samples) < 2:
+            return 0.0
+        lower, _, upper = statistics.quantiles(self.samples, n=4)
+        return upper - lower
+
+    @property
+    def ops_per_second(self):
+        median = self.median
+        if not median:
+            return float("inf")
+        return 1.0 / median
+
+    def as_dict(self):
+        return {
+            "median": self.median,
+            "iqr": self.iqr,
+            "ops_per_second": self.ops_per_second,
+            "iterations": self.iterations,
+            "samples": self.samples,
+        }
+
+
+def _format_seconds(seconds):
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "%.3g%s" % (seconds / scale, unit)
+    return "%.3gns" % (seconds / 1e-9,)
+
+
+def format_comparison(title, rows):
+    """Format a table comparing the benchmarks of several scenarios.
+
+    :param title: The heading of the table, usually the id of the test.
+    :param rows: A list of (scenario name, BenchmarkStats).
+    :return: The table, as a string.
+    """
+    fastest = min((stats.median for _, stats in rows), default=0.0)
+    header = ("scenario", "median", "IQR", "ops/sec", "relative")
+    lines = [header]
+    for name, stats in rows:
+        relative = stats.median / fastest if fastest else 1.0
+        lines.append(
+            (
+                name,
+                _format_seconds(stats.median),
+                _format_seconds(stats.iqr),
+                "%.0f" % (stats.ops_per_second,),
+                "%.2f" % (relative,),
+            )
+        )
+    widths = [max(len(line[column]) for line in lines) for column in range(5)]
+    output = [title]
+    for line in lines:
+        cells = [line[0].ljust(widths[0])]
+        cells.extend(cell.rjust(width) for cell, width in zip(line[1:], widths[1:]))
+        output.append("  " + "  ".join(cells))
+    return "\n".join(output) + "\n"
+
+
+_results_cache = {}
+_results_lock = threading.Lock()
+
+
+def _load_results(path):
+    # Benchmark results files, cached until they change on disk.
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _results_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            cached = (mtime, json.load(f))
+        _results_cache[path] = cached
+    return cached[1]
+
+
+def _save_result(path, test_id, stats):
+    # Merge the statistics of one test into a benchmark results file.
+    with _results_lock:
+        merged = dict(_load_results(path))
+        merged[test_id] = stats.as_dict()
+        with open(path, "w") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+        _results_cache[path] = (os.stat(path).st_mtime_ns, merged)
+
+
+class BenchmarkWithScenarios(WithScenarios):
+    """A mixin for TestCase which benchmarks each scenario of a test.
+
+    Each test body is called repeatedly, between a single setUp and tearDown:
+    benchmark_warmup untimed calls, then benchmark_repeat samples, each timing
+    enough calls to take at least benchmark_min_time seconds. The timings are
+    kept as the benchmark_stats attribute of each test.
+
+    If benchmark_results is set, the statistics of each test are merged into
+    that JSON file, keyed by test id, as soon as it has been measured. When
+    the test expands its own scenarios, once all of them have run a table
+    comparing them is written to benchmark_stream (sys.stderr if None); tests
+    expanded elsewhere, such as by load_tests_apply_scenarios or the pytest
+    plugin, run one scenario at a time and write no table.
+    If benchmark_baseline names a file in the same format, a test whose
+    median time exceeds the baseline's by more than benchmark_threshold (a
+    fraction) fails.
+
+    benchmark_timer is the clock used, such as time.perf_counter or
+    time.process_time. A Python function must be wrapped in staticmethod.
+    """
+
+    benchmark_warmup = 1
+    benchmark_repeat = 5
+    benchmark_min_time = 0.05
+    benchmark_timer = time.perf_counter
+    benchmark_baseline = None
+    benchmark_threshold = 0.1
+    benchmark_results = None
+    benchmark_stream = None
+
+    def run(self, result=None):
+        if not self._get_scenarios():
+            return self._run_benchmark(result)
+        tests = []
+        for test in generate_scenarios(
+            self, budget=self.scenario_budget, profiler=self.scenario_profiler
+        ):
+            test.run(result)
+            tests.append(test)
+        self._report(tests)
+
+    def _run_benchmark(self, result):
+        name = self._testMethodName
+        method = getattr(self, name)
+
+        # Keep the method's attributes, such as unittest.expectedFailure's.
+        @functools.wraps(method)
+        def benchmark():
+            self.benchmark_stats = self._measure(method)
+            if self.benchmark_results is not None:
+                _save_result(self.benchmark_results, self.id(), self.benchmark_stats)
+            self._check_baseline(self.benchmark_stats)
+
+        setattr(self, name, benchmark)
+        try:
+            return super().run(result)
+        finally:
+            delattr(self, name)
+
+    def _time(self, method, iterations):
+        timer = self.benchmark_timer
+        start = timer()
+        for _ in range(iterations):
+            method()
+        return timer() - start
+
+    def _measure(self, method):
+        for _ in range(self.benchmark_warmup):
+            method()
+        iterations = 1
+        while True:
+            elapsed = self._time(method, iterations)
+            if elapsed >= self.benchmark_min_time:
+                break
+            iterations *= 2
+        samples = [elapsed / iterations]
+        for _ in range(self.benchmark_repeat - 1):
+            samples.append(self._time(method, iterations) / iterations)
+        return BenchmarkStats(samples, iterations)
+
+    def _check_baseline(self, stats):
+        if self.benchmark_baseline is None:
+            return
+        baseline = _load_results(self.benchmark_baseline).get(self.id())
+        if baseline is None:
+            return
+        limit = baseline["median"] * (1 + self.benchmark_threshold)
+        if stats.median > limit:
+            self.fail(
+                "benchmark regressed: median %s against a baseline of %s "
+                "(threshold %g%%)"
+                % (
+                    _format_seconds(stats.median),
+                    _format_seconds(baseline["median"]),
+                    self.benchmark_threshold * 100,
+                )
+            )
+
+    def _report(self, tests):
+        rows = []
+        for test in tests:
+            stats = getattr(test, "benchmark_stats", None)
+            if stats is not None:
+                rows.append((",".join(scenario_id(test).names), stats))
+        if not rows:
+            return
+        stream = self.benchmark_stream
+        if stream is None:
+            stream = sys.stderr
+        stream.write(format_comparison(self.id(), rows))
+
+
+class TestBenchmarkWithScenarios(BenchmarkWithScenarios, unittest.TestCase):
+    """Unittest TestCase which benchmarks each scenario of a test.
+
+    See BenchmarkWithScenarios.
+    """
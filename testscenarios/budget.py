@@ -0,0 +1,264 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+"""Running scenario tests within a wall-clock time budget."""
+
+__all__ = [
+    "ScenarioBudget",
+    "ScenarioHistory",
+    "apply_budget",
+]
+
+import os
+import threading
+import time
+
+from testscenarios.ids import scenario_id
+
+
+class ScenarioHistory:
+    """The duration and outcome of previous runs of scenario tests.
+
+    Records are keyed by test id, less the seed of sampled scenarios (see
+    ScenarioId.unseeded). If a path is given, records are loaded from
+    it when it exists, and save() writes them back.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._records = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            import json
+
+            with open(path) as f:
+                self._records = json.load(f)
+
+    def get(self, test_id):
+        """Return (duration, failed) for the last run of test_id, or None."""
+        record = self._records.get(test_id)
+        if record is None:
+            return None
+        return tuple(record)
+
+    def test_ids(self):
+        """Return the ids of the tests with records."""
+        with self._lock:
+            return list(self._records)
+
+    def record(self, test_id, duration, failed):
+        """Record that test_id took duration seconds and whether it failed."""
+        with self._lock:
+            self._records[test_id] = [duration, failed]
+            self._dirty = True
+
+    def save(self):
+        """Write the records to path, if there is a path and they changed.
+
+        The records are written to a temporary file which then replaces
+        path, so an interrupted save leaves the previous history intact.
+        """
+        if self.path is None or not self._dirty:
+            return
+        import json
+
+        with self._lock:
+            partial = self.path + ".tmp"
+            with open(partial, "w") as f:
+                json.dump(self._records, f)
+            os.replace(partial, self.path)
+            self._dirty = False
+
+
+class ScenarioBudget:
+    """A wall-clock budget for running scenario tests.
+
+    Pass a ScenarioBudget to generate_scenarios, or set it as the
+    scenario_budget attribute of a WithScenarios test. The scenarios of each
+    test are then run in priority order: scenarios which failed last time
+    first, then scenarios using a scenario name not used by any earlier
+    scenario of that test, then the rest; within each group the scenarios
+    that were quickest last time go first. Once the budget is spent the
+    remaining tests are reported as skipped.
+
+    The history is saved by save(), at most every save_interval seconds
+    while tests run, and when the process exits.
+    """
+
+    def __init__(
+        self,
+        seconds,
+        per_test=False,
+        history=None,
+        clock=time.monotonic,
+        save_interval=60.0,
+    ):
+        """Create a ScenarioBudget.
+
+        :param seconds: The budget, in seconds.
+        :param per_test: If True, each test that is multiplied by scenarios
+            gets the full budget. Otherwise the budget is shared by every
+            test run with it.
+        :param history: A ScenarioHistory, or a path to load one from. If
+            None, an in-memory history is used.
+        :param clock: A function returning the current time in seconds.
+        :param save_interval: The least time, in seconds, between saves of
+            the history while tests run.
+        """
+        self.seconds = seconds
+        self.per_test = per_test
+        if not isinstance(history, ScenarioHistory):
+            history = ScenarioHistory(history)
+        self.history = history
+        self.save_interval = save_interval
+        self._clock = clock
+        self._deadlines = {}
+        self._next_save = time.monotonic() + save_interval
+        self._lock = threading.Lock()
+        if history.path is not None:
+            import atexit
+
+            atexit.register(history.save)
+
+    def prioritise(self, test, scenarios):
+        """Return scenarios sorted into the order they should be run in.
+
+        :param test: The test the scenarios are to be applied to.
+        :param scenarios: An iterable of scenarios.
+        :return: A list of scenarios.
+        """
+        base_id = scenario_id(test)
+        failed = []
+        rest = []
+        for scenario in scenarios:
+            record = self.history.get(_history_key(base_id.applied(scenario[0])))
+            if record is None:
+                rest.append((0.0, scenario))
+            elif record[1]:
+                failed.append((record[0], scenario))
+            else:
+                rest.append((record[0], scenario))
+        failed.sort(key=_cost)
+        rest.sort(key=_cost)
+        covered = set()
+        for _, (name, _) in failed:
+            covered.update(enumerate(name.split(",")))
+        new = []
+        old = []
+        for _, scenario in rest:
+            components = set(enumerate(scenario[0].split(",")))
+            if components - covered:
+                covered.update(components)
+                new.append(scenario)
+            else:
+                old.append(scenario)
+        return [scenario for _, scenario in failed] + new + old
+
+    def _budget_key(self, test):
+        if self.per_test:
+            return scenario_id(test).base
+        return None
+
+    def start(self, test):
+        """Start the clock for test's budget, if it has not started yet.
+
+        A per-test budget has a clock for each test multiplied by scenarios,
+        started when the first of its scenarios runs; a shared budget has a
+        single clock, started when the first test runs.
+        """
+        key = self._budget_key(test)
+        with self._lock:
+            if key not in self._deadlines:
+                self._deadlines[key] = self._clock() + self.seconds
+
+    def exhausted(self, test):
+        """Return True if test's budget has been spent."""
+        deadline = self._deadlines.get(self._budget_key(test))
+        return deadline is not None and self._clock() >= deadline
+
+    def run(self, test, result, run=None):
+        """Run test if there is budget left, recording how it went.
+
+        The clock of test's budget is started if need be, and the history is
+        saved if save_interval has passed since it was last saved.
+
+        :param run: The function to run test with; test.run if None.
+        :return: True if the test was run.
+        """
+        self.start(test)
+        if self.exhausted(test):
+            result.startTest(test)
+            result.addSkip(
+                test, "scenario time budget of %gs exhausted" % (self.seconds,)
+            )
+            result.stopTest(test)
+            return False
+        problems = _count_problems(result)
+        if run is None:
+            run = test.run
+        start = self._clock()
+        run(result)
+        self.history.record(
+            _history_key(scenario_id(test)),
+            self._clock() - start,
+            _count_problems(result) > problems,
+        )
+        if time.monotonic() >= self._next_save:
+            self.save()
+        return True
+
+    def save(self):
+        """Save the history, if it has a path and changed."""
+        self._next_save = time.monotonic() + self.save_interval
+        self.history.save()
+
+
+def _cost(entry):
+    return entry[0]
+
+
+def _history_key(structured):
+    # Records are kept without the seed of sampling, which can differ from
+    # run to run.
+    return str(structured.unseeded())
+
+
+def _count_problems(result):
+    return len(getattr(result, "failures", ())) + len(getattr(result, "errors", ()))
+
+
+def apply_budget(test, budget):
+    """Make test only run if its ScenarioBudget allows.
+
+    generate_scenarios calls this for each test it creates when it is given a
+    budget. The test's run method is replaced on the instance, so the test
+    keeps its class and runs with its class and module fixtures as usual.
+
+    :param test: The test to run.
+    :param budget: The ScenarioBudget to run it within.
+    :return: test.
+    """
+    run = test.run
+
+    def budgeted_run(result=None):
+        if result is None:
+            result = test.defaultTestResult()
+        budget.run(test, result, run)
+        return result
+
+    test.run = budgeted_run
+    return test
@@ -0,0 +1,157 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+"""Structured ids for tests with scenarios applied."""
+
+__all__ = [
+    "ScenarioId",
+    "parse_scenario_id",
+    "scenario_id",
+]
+
+
+class ScenarioId:
+    """The id of a test with scenarios applied.
+
+    The id is kept as the id of the original test (base), the names of the
+    scenarios applied to it, in order (names), and the seed they were sampled
+    with, if any (seed). It renders to the usual string form,
+    ``base(name1)(name2)``, with ``(seed=N)`` after the names of sampled
+    scenarios, the first time it is needed, and compares and hashes equal to
+    that string.
+    """
+
+    __slots__ = ("_rendered", "base", "names", "seed")
+
+    def __init__(self, base, names=(), seed=None):
+        """Create a ScenarioId.
+
+        :param base: The id of the test before any scenario was applied.
+        :param names: A tuple of the names of the scenarios applied.
+        :param seed: The seed the scenarios were sampled with, or None.
+        """
+        self.base = base
+        self.names = names
+        self.seed = seed
+        self._rendered = None
+
+    @property
+    def components(self):
+        """The individual scenario names, with compound names split up.
+
+        ``base(a,b)(c)`` has the components ``("a", "b", "c")``.
+        """
+        return tuple(component for name in self.names for component in name.split(","))
+
+    def unseeded(self):
+        """Return this ScenarioId without the seed of sampling.
+
+        The unseeded id stays the same whichever seed the scenarios were
+        sampled with, so it is what histories and profiles are kept by.
+        """
+        if self.seed is None:
+            return self
+        return ScenarioId(self.base, self.names)
+
+    def applied(self, name, seed=None):
+        """Return the ScenarioId after applying a further scenario.
+
+        :param seed: The seed the scenario was sampled with, if it was.
+        """
+        if seed is None:
+            seed = self.seed
+        return ScenarioId(self.base, self.names + (name,), seed)
+
+    def __str__(self):
+        rendered = self._rendered
+        if rendered is None:
+            rendered = self.base + "".join(["(" + name + ")" for name in self.names])
+            if self.seed is not None:
+                rendered += "(seed=%d)" % (self.seed,)
+            self._rendered = rendered
+        return rendered
+
+    def __eq__(self, other):
+        if isinstance(other, ScenarioId):
+            return (
+                self.base == other.base
+                and self.names == other.names
+                and self.seed == other.seed
+            )
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __repr__(self):
+        if self.seed is None:
+            return "ScenarioId(%r, %r)" % (self.base, self.names)
+        return "ScenarioId(%r, %r, %r)" % (self.base, self.names, self.seed)
+
+
+def parse_scenario_id(test_id):
+    """Split a test id string into a ScenarioId.
+
+    Each trailing parenthesised group is taken to be an applied scenario,
+    except that a last group of the form ``seed=N`` gives the seed, so this
+    inverts str(ScenarioId) for scenario names with balanced parentheses. It
+    uses plain string searches rather than regular expressions, for use over
+    very many ids.
+
+    :param test_id: A test id string.
+    :return: A ScenarioId.
+    """
+    names = []
+    end = len(test_id)
+    while end and test_id[end - 1] == ")":
+        start = test_id.rfind("(", 0, end - 1)
+        # Widen the group until its parentheses balance.
+        while start > 0:
+            group = test_id[start + 1 : end - 1]
+            if group.count("(") >= group.count(")"):
+                break
+            start = test_id.rfind("(", 0, start)
+        if start <= 0:
+            break
+        names.append(test_id[start + 1 : end - 1])
+        end = start
+    names.reverse()
+    seed = None
+    if names and names[-1].startswith("seed=") and names[-1][5:].isdigit():
+        seed = int(names.pop()[5:])
+    return ScenarioId(test_id[:end], tuple(names), seed)
+
+
+def _carried_scenario_id(test):
+    # The ScenarioId set by apply_scenario, if it is still the test's id.
+    structured = getattr(test, "scenario_id", None)
+    if isinstance(structured, ScenarioId) and test.id == structured.__str__:
+        return structured
+    return None
+
+
+def scenario_id(test):
+    """Return the ScenarioId of test.
+
+    Tests created by apply_scenario carry their ScenarioId; the id of any
+    other test is parsed with parse_scenario_id.
+    """
+    structured = _carried_scenario_id(test)
+    if structured is None:
+        structured = parse_scenario_id(test.id())
+    return structured
@@ -0,0 +1,395 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+"""Read-only scenario parameters shared between cloned tests.
+
+Scenario parameters are set onto every test a scenario is applied to, so a
+large payload ends up referenced by many tests at once. Wrapping it with
+``shared`` or ``shared_file`` gives each test a ``CopyOnWrite`` view instead:
+reads go to the single shared payload, and the first mutation made by a test
+gives that test a private copy.
+"""
+
+__all__ = [
+    "CopyOnWrite",
+    "SharedParameter",
+    "readonly",
+    "shared",
+    "shared_file",
+]
+
+import copy
+import itertools
+import mmap
+import operator
+import os
+import threading
+import types
+
+# Methods which mutate their object in place. Looking one of these up on a
+# CopyOnWrite view makes the private copy first.
+_MUTATORS = frozenset(
+    [
+        "add",
+        "append",
+        "clear",
+        "difference_update",
+        "discard",
+        "extend",
+        "fill",
+        "insert",
+        "intersection_update",
+        "itemset",
+        "pop",
+        "popitem",
+        "put",
+        "remove",
+        "resize",
+        "reverse",
+        "setdefault",
+        "sort",
+        "symmetric_difference_update",
+        "update",
+    ]
+)
+
+_BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+# Types whose values can never be changed, so need no protecting.
+_IMMUTABLE_TYPES = (bytes, str, int, float, complex, bool, type(None))
+
+# The PyBUF_WRITABLE flag passed to __buffer__.
+_PYBUF_WRITABLE = 0x0001
+
+
+def _immutable(value):
+    if isinstance(value, (tuple, frozenset)):
+        return all(map(_immutable, value))
+    return type(value) in _IMMUTABLE_TYPES
+
+
+class SharedParameter:
+    """A scenario parameter whose payload is shared by every test.
+
+    apply_scenario calls view() for each test it creates, so tests never see
+    the payload object itself.
+    """
+
+    def __init__(self, payload):
+        self._payload = payload
+        self._reader = None
+        self._flat = None
+
+    def reader(self):
+        """Return the object views can read from without copying, or None.
+
+        Objects with a numpy style ``view``/``setflags`` interface get a
+        non-writeable view. Lists, tuples, sets and dicts holding only
+        immutable values are read directly, as nothing read from them can be
+        changed. Anything else has no reader: each view makes a private copy
+        when it is first read, so that nested objects are never shared.
+        """
+        if self._reader is None:
+            payload = self._payload
+            if hasattr(payload, "setflags") and hasattr(payload, "view"):
+                payload = payload.view()
+                payload.setflags(write=False)
+                self._reader = payload
+            elif self._is_flat():
+                self._reader = payload
+        return self._reader
+
+    def _is_flat(self):
+        if self._flat is None:
+            payload = self._payload
+            if isinstance(payload, dict):
+                values = itertools.chain(payload.keys(), payload.values())
+            elif isinstance(payload, (list, tuple, set, frozenset)):
+                values = payload
+            else:
+                values = None
+            self._flat = values is not None and all(map(_immutable, values))
+        return self._flat
+
+    def readonly(self):
+        """Return a read-only form of the payload, or None if it has none.
+
+        This is the reader for numpy style arrays; a tuple, mapping proxy or
+        frozenset for a flat list, dict or set; and None otherwise.
+        """
+        reader = self.reader()
+        if isinstance(reader, list):
+            return tuple(reader)
+        if isinstance(reader, dict):
+            return types.MappingProxyType(reader)
+        if isinstance(reader, set):
+            return frozenset(reader)
+        return reader
+
+    def copy(self):
+        """Return a private, mutable copy of the payload."""
+        return copy.deepcopy(self._payload)
+
+    def view(self):
+        """Return a new CopyOnWrite view of the payload.
+
+        Immutable payloads, such as bytes and str, are returned as they are.
+        """
+        if type(self._payload) in _IMMUTABLE_TYPES and self._payload is not None:
+            return self._payload
+        return CopyOnWrite(self)
+
+
+class SharedBuffer(SharedParameter):
+    """A shared bytes-like payload, exposed through a read-only memoryview."""
+
+    def reader(self):
+        if self._reader is None:
+            self._reader = memoryview(self._payload).toreadonly()
+        return self._reader
+
+    readonly = reader
+
+    def copy(self):
+        return bytearray(self.reader())
+
+
+class SharedFile(SharedBuffer):
+    """The contents of a file, memory mapped read-only on first use."""
+
+    def __init__(self, path):
+        super().__init__(None)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def reader(self):
+        if self._reader is None:
+            with self._lock:
+                if self._reader is None:
+                    self._reader = self._map()
+        return self._reader
+
+    readonly = reader
+
+    def _map(self):
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self._payload = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                # Empty files cannot be mapped.
+                self._payload = b""
+        return memoryview(self._payload).toreadonly()
+
+    def view(self):
+        return CopyOnWrite(self)
+
+
+def _binary(name):
+    def operator(self, other):
+        return getattr(self._operand(), name)(other)
+
+    operator.__name__ = name
+    return operator
+
+
+def _inplace(operation):
+    def operator(self, other):
+        object.__setattr__(self, "_copy", operation(self._writable(), other))
+        return self
+
+    operator.__name__ = operation.__name__
+    return operator
+
+
+class CopyOnWrite:
+    """A per-test view of a SharedParameter.
+
+    Reads are forwarded to the shared payload when it can be read without
+    exposing anything mutable, and otherwise to a private copy made on first
+    read. Item assignment, item deletion, in-place operators, attribute
+    assignment and the usual mutating methods (append, update, ...) first
+    replace the view's target with a private copy, so other tests never
+    observe the change.
+
+    A view of a buffer reads through a read-only memoryview. The methods of
+    bytes that memoryview lacks (decode, startswith, split, ...), ``in`` with
+    a bytes operand and the binary operators work on a bytes copy of the
+    contents. On Python 3.12 and later the view supports the buffer protocol
+    itself; on older versions pass readonly(view) to code that needs a
+    buffer.
+    """
+
+    __slots__ = ("_copy", "_shared")
+
+    def __init__(self, shared):
+        object.__setattr__(self, "_shared", shared)
+        object.__setattr__(self, "_copy", None)
+
+    def _target(self):
+        if self._copy is None:
+            reader = self._shared.reader()
+            if reader is not None:
+                return reader
+            object.__setattr__(self, "_copy", self._shared.copy())
+        return self._copy
+
+    def _writable(self):
+        if self._copy is None:
+            object.__setattr__(self, "_copy", self._shared.copy())
+        return self._copy
+
+    def _operand(self):
+        target = self._target()
+        if isinstance(target, memoryview):
+            return bytes(target)
+        return target
+
+    def __getattr__(self, name):
+        if name in CopyOnWrite.__slots__:
+            raise AttributeError(name)
+        if name in _MUTATORS:
+            return getattr(self._writable(), name)
+        target = self._target()
+        if isinstance(target, memoryview) and not hasattr(target, name):
+            return getattr(bytes(target), name)
+        return getattr(target, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._writable(), name, value)
+
+    def __getitem__(self, key):
+        return self._target()[key]
+
+    def __setitem__(self, key, value):
+        self._writable()[key] = value
+
+    def __delitem__(self, key):
+        del self._writable()[key]
+
+    __add__ = _binary("__add__")
+    __radd__ = _binary("__radd__")
+    __sub__ = _binary("__sub__")
+    __rsub__ = _binary("__rsub__")
+    __mul__ = _binary("__mul__")
+    __rmul__ = _binary("__rmul__")
+    __mod__ = _binary("__mod__")
+    __and__ = _binary("__and__")
+    __rand__ = _binary("__rand__")
+    __or__ = _binary("__or__")
+    __ror__ = _binary("__ror__")
+    __xor__ = _binary("__xor__")
+    __rxor__ = _binary("__rxor__")
+
+    __iadd__ = _inplace(operator.iadd)
+    __isub__ = _inplace(operator.isub)
+    __imul__ = _inplace(operator.imul)
+    __iand__ = _inplace(operator.iand)
+    __ior__ = _inplace(operator.ior)
+    __ixor__ = _inplace(operator.ixor)
+
+    def __len__(self):
+        return len(self._target())
+
+    def __iter__(self):
+        return iter(self._target())
+
+    def __contains__(self, item):
+        target = self._target()
+        if isinstance(target, memoryview) and not isinstance(item, int):
+            target = bytes(target)
+        return item in target
+
+    def __bytes__(self):
+        return bytes(self._target())
+
+    def __buffer__(self, flags):
+        if flags & _PYBUF_WRITABLE:
+            return memoryview(self._writable())
+        return memoryview(self._target())
+
+    def __array__(self, *args, **kwargs):
+        return self._target().__array__(*args, **kwargs)
+
+    def __eq__(self, other):
+        if isinstance(other, CopyOnWrite):
+            other = other._target()
+        return self._target() == other
+
+    __hash__ = None
+
+    def __copy__(self):
+        result = CopyOnWrite(self._shared)
+        if self._copy is not None:
+            object.__setattr__(result, "_copy", copy.copy(self._copy))
+        return result
+
+    def __deepcopy__(self, memo):
+        if self._copy is None:
+            return self._shared.copy()
+        return copy.deepcopy(self._copy, memo)
+
+    def __repr__(self):
+        return "CopyOnWrite(%r)" % (self._target(),)
+
+
+def readonly(value):
+    """Return a read-only form of what a CopyOnWrite view reads from.
+
+    Until the view has been written to, this is the shared payload in
+    read-only form: a read-only memoryview for buffers, a non-writeable view
+    for numpy style arrays, and a tuple, mapping proxy or frozenset for flat
+    lists, dicts and sets. Payloads with no read-only form, and views that
+    have been written to, give the view's private copy. It is useful for
+    passing a shared buffer to code that needs the buffer protocol. Other
+    values are returned unaltered.
+    """
+    if isinstance(value, CopyOnWrite):
+        if value._copy is None:
+            frozen = value._shared.readonly()
+            if frozen is not None:
+                return frozen
+        return value._target()
+    return value
+
+
+def shared(payload):
+    """Wrap payload so that scenarios share it without copying.
+
+    bytes and other immutable payloads need no protecting, and are given to
+    each test as they are. bytearray, memoryview and mmap payloads are read
+    through read-only memoryviews and copied into a bytearray on first
+    write. Numpy style arrays are read through non-writeable views. Lists,
+    tuples, sets and dicts of immutable values are read directly. Other
+    payloads are deep copied by each test that reads or writes them.
+
+    :param payload: The object to share.
+    :return: A SharedParameter to use as a scenario parameter value.
+    """
+    if isinstance(payload, _BUFFER_TYPES):
+        return SharedBuffer(payload)
+    return SharedParameter(payload)
+
+
+def shared_file(path):
+    """Share the contents of the file at path between scenarios.
+
+    The file is memory mapped read-only the first time a test reads it, so
+    only the pages actually touched are loaded.
+
+    :param path: The path of the file to share.
+    :return: A SharedParameter to use as a scenario parameter value.
+    """
+    return SharedFile(path)
@@ -0,0 +1,190 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+"""Profiling scenario tests, with the profiles kept per scenario."""
+
+__all__ = [
+    "ScenarioProfiler",
+    "apply_profiler",
+]
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+
+from testscenarios.ids import scenario_id
+
+
+def _function_label(function):
+    filename, line, name = function
+    if filename == "~":
+        return name
+    return "%s:%d(%s)" % (os.path.basename(filename), line, name)
+
+
+class ScenarioProfiler:
+    """Profiles scenario tests and merges the profiles by scenario.
+
+    Pass a ScenarioProfiler to generate_scenarios, or set it as the
+    scenario_profiler attribute of a WithScenarios test, and each test made
+    from a scenario is run under cProfile. The profiles of all tests with the
+    same scenario name are merged, and report() compares, for each
+    dimension of compound scenario names, where the time went for each of
+    the scenarios in that dimension.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def run(self, test, result, run=None):
+        """Run test under the profiler, keeping its profile.
+
+        :param run: The function to run test with; test.run if None.
+        """
+        if run is None:
+            run = test.run
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active; run the test without ours.
+            run(result)
+            return
+        try:
+            run(result)
+        finally:
+            profile.disable()
+        names = scenario_id(test).unseeded().names
+        with self._lock:
+            stats = self._stats.get(names)
+            if stats is None:
+                self._stats[names] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+
+    def by_scenario(self):
+        """Return a dict mapping scenario name to pstats.Stats.
+
+        Names applied by separate apply_scenario calls are joined with ","
+        just as multiply_scenarios joins them.
+        """
+        return {",".join(names): stats for names, stats in self._stats.items()}
+
+    def by_dimension(self):
+        """Return the profiles merged per dimension of the scenario names.
+
+        :return: A list with one dict per dimension (position in the
+            compound scenario names), mapping each scenario name used in that
+            dimension to the merged pstats.Stats of all the tests using it.
+        """
+        dimensions = []
+        for names, stats in self._stats.items():
+            components = ",".join(names).split(",")
+            while len(dimensions) < len(components):
+                dimensions.append({})
+            for dimension, component in zip(dimensions, components):
+                merged = dimension.get(component)
+                if merged is None:
+                    merged = dimension[component] = pstats.Stats()
+                merged.add(stats)
+        return dimensions
+
+    def report(self, stream=None, limit=10):
+        """Write a report comparing the scenarios of each dimension.
+
+        For each dimension, the functions which take the most time in any
+        scenario are listed, with the share of each scenario's total time
+        spent in that function (excluding the functions it calls).
+
+        :param stream: The stream to write to; sys.stdout if None.
+        :param limit: How many functions to list for each scenario.
+        """
+        if stream is None:
+            stream = sys.stdout
+        for index, dimension in enumerate(self.by_dimension()):
+            values = sorted(dimension)
+            shares = {}
+            functions = []
+            for value in values:
+                stats = dimension[value]
+                total = stats.total_tt or 1.0
+                value_shares = {
+                    function: entry[2] / total
+                    for function, entry in stats.stats.items()
+                    if "_lsprof.Profiler" not in function[2]
+                }
+                shares[value] = value_shares
+                ranked = sorted(value_shares, key=value_shares.get, reverse=True)
+                for function in ranked[:limit]:
+                    if function not in functions:
+                        functions.append(function)
+            functions.sort(
+                key=lambda f: max(shares[value].get(f, 0.0) for value in values),
+                reverse=True,
+            )
+            rows = [["function"] + values]
+            for function in functions:
+                rows.append(
+                    [_function_label(function)]
+                    + [
+                        "%.1f%%" % (shares[value].get(function, 0.0) * 100,)
+                        for value in values
+                    ]
+                )
+            widths = [
+                max(len(row[column]) for row in rows) for column in range(len(rows[0]))
+            ]
+            stream.write("dimension %d\n" % (index + 1,))
+            for row in rows:
+                cells = [row[0].ljust(widths[0])]
+                cells.extend(
+                    cell.rjust(width) for cell, width in zip(row[1:], widths[1:])
+                )
+                stream.write("  " + "  ".join(cells) + "\n")
+
+    def dump(self, directory):
+        """Write the profile of each scenario to directory.
+
+        Each profile is written as <scenario name>.prof, in the format read
+        by pstats and tools such as snakeviz.
+        """
+        for name, stats in self.by_scenario().items():
+            filename = name.replace(os.sep, "_") + ".prof"
+            stats.dump_stats(os.path.join(directory, filename))
+
+
+def apply_profiler(test, profiler):
+    """Make test run under a ScenarioProfiler.
+
+    generate_scenarios calls this for each test it creates when it is given a
+    profiler. The test's run method is replaced on the instance, so the test
+    keeps its class and runs with its class and module fixtures as usual.
+
+    :return: test.
+    """
+    run = test.run
+
+    def profiled_run(result=None):
+        if result is None:
+            result = test.defaultTestResult()
+        profiler.run(test, result, run)
+        return result
+
+    test.run = profiled_run
+    return test
@@ -0,0 +1,142 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+"""A pytest plugin collecting one item per scenario of each test.
+
+Without this plugin pytest collects a TestWithScenarios class through its
+unittest support, and all the scenarios of a test run inside a single item;
+in a module using load_tests_apply_scenarios the scenarios are not applied at
+all. With it, every test of a class with scenarios is collected as one item
+per scenario, named like "test_query(sqlite)", so that scenarios can be
+selected with -k, distributed by pytest-xdist and timed individually.
+
+The plugin is registered through the pytest11 entry point, but changes
+nothing unless the testscenarios_items ini option is true, for instance with
+"-o testscenarios_items=true". It needs pytest 8.2 or later.
+
+The items are collected by pytest's own unittest support, so class and module
+fixtures such as setUpClass and setUpModule run just as they do for other
+unittest tests. Nothing is cloned: each item makes its own test instance
+and applies its scenario to it.
+"""
+
+__all__ = [
+    "ScenarioItem",
+    "ScenarioTestCase",
+]
+
+import sys
+import unittest
+
+import pytest
+
+try:
+    from _pytest.unittest import TestCaseFunction, UnitTestCase
+except ImportError:
+    TestCaseFunction = UnitTestCase = None
+
+# The plugin builds on pytest internals which arrived in pytest 8.2; with
+# pytest versions lacking them it collects nothing itself.
+_SUPPORTED = TestCaseFunction is not None and hasattr(TestCaseFunction, "_getinstance")
+
+
+def pytest_addoption(parser):
+    parser.addini(
+        "testscenarios_items",
+        type="bool",
+        default=False,
+        help="collect one item per test and scenario of unittest classes "
+        "with scenarios",
+    )
+
+
+def pytest_configure(config):
+    if config.getini("testscenarios_items") and not _SUPPORTED:
+        config.issue_config_time_warning(
+            pytest.PytestConfigWarning(
+                "testscenarios_items needs pytest 8.2 or later, and is ignored"
+            ),
+            stacklevel=2,
+        )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pycollect_makeitem(collector, name, obj):
+    if not _SUPPORTED:
+        return None
+    if not isinstance(obj, type) or not issubclass(obj, unittest.TestCase):
+        return None
+    if not getattr(obj, "scenarios", None):
+        return None
+    if not collector.config.getini("testscenarios_items"):
+        return None
+    from testscenarios.scenarios import load_tests_apply_scenarios
+    from testscenarios.testcase import WithScenarios
+
+    module = sys.modules.get(obj.__module__)
+    if not issubclass(obj, WithScenarios) and (
+        getattr(module, "load_tests", None) is not load_tests_apply_scenarios
+    ):
+        return None
+    return ScenarioTestCase.from_parent(collector, name=name, obj=obj)
+
+
+if _SUPPORTED:
+
+    class ScenarioTestCase(UnitTestCase):
+        """Collects a TestCase class with one item per test and scenario."""
+
+        def collect(self):
+            from testscenarios.scenarios import _test_scenarios
+
+            scenarios = _test_scenarios(self.obj)
+            for item in super().collect():
+                for scenario in scenarios:
+                    yield ScenarioItem.from_parent(
+                        self,
+                        name="%s(%s)" % (item.name, scenario[0]),
+                        originalname=item.name,
+                        scenario=scenario,
+                    )
+
+    class ScenarioItem(TestCaseFunction):
+        """One test of a TestCase class, with one scenario applied.
+
+        The scenario is applied to the test instance pytest makes for the item,
+        and the test is then run like any other unittest test.
+        """
+
+        def __init__(self, *, scenario, **kwargs):
+            # Set before initialising, which makes the test instance.
+            self.scenario = scenario
+            super().__init__(**kwargs)
+            self.extra_keyword_matches.update(scenario[0].split(","))
+
+        def _getinstance(self):
+            from testscenarios.scenarios import _set_scenario
+
+            test = self.parent.obj(self.originalname)
+            test.scenarios = None
+            _set_scenario(test, self.scenario)
+            return test
+
+        def runtest(self):
+            from testscenarios.scenarios import _unavailable_module
+
+            module = _unavailable_module(self.scenario)
+            if module is not None:
+                pytest.skip(module.reason)
+            super().runtest()
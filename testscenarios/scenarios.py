@@ -16,41 +16,162 @@
 # limitations under that license.
 
 __all__ = [
+    "DeduplicatedScenarios",
+    "ExtendedScenarios",
+    "ScenarioTable",
+    "UnavailableModule",
+    "UnavailableScenarioTest",
     "apply_scenario",
     "apply_scenarios",
+    "deduplicate_scenarios",
     "generate_scenarios",
     "load_tests_apply_scenarios",
     "multiply_scenarios",
+    "sample_multiply_scenarios",
+    "sample_scenarios",
+    "write_scenario_table",
 ]
 
 from itertools import (
     product,
 )
+import copy
+import math
+import mmap
+import os
+import struct
 import sys
+import threading
 
-from testtools.testcase import clone_test_with_new_id
-from testtools import iterate_tests
+from testscenarios.budget import apply_budget
+from testscenarios.ids import ScenarioId, _carried_scenario_id, parse_scenario_id
+from testscenarios.parameters import CopyOnWrite, SharedParameter
 
 
 def apply_scenario(scenario, test):
     """Apply scenario to test.
 
     :param scenario: A tuple (name, parameters) to apply to the test. The test
-        is cloned, its id adjusted to have (name) after it, and the parameters
-        dict is used to update the new test.
+        is cloned, its id adjusted to have (name) after it (the structured
+        form of the id is kept as the scenario_id attribute of the new test,
+        see testscenarios.ids), and the parameters
+        dict is used to update the new test. SharedParameter values (see
+        testscenarios.parameters) are replaced by a fresh CopyOnWrite view for
+        each new test.
     :param test: The test to apply the scenario to. This test is unaltered.
     :return: A new test cloned from test, with the scenario applied.
     """
+    newtest = copy.copy(test)
+    _unshare_state(newtest)
+    _set_scenario(newtest, scenario)
+    return newtest
+
+
+def _set_scenario(test, scenario):
+    # Apply scenario to test itself, rather than to a clone.
     name, parameters = scenario
-    scenario_suffix = "(" + name + ")"
-    newtest = clone_test_with_new_id(test, test.id() + scenario_suffix)
+    new_id = _scenario_id_of(test).applied(name, parameters.get("scenario_seed"))
     test_desc = test.shortDescription()
+    # The string form of the id is only built if id() is called.
+    test.id = new_id.__str__
+    test.scenario_id = new_id
     if test_desc is not None:
-        newtest_desc = "%(test_desc)s %(scenario_suffix)s" % vars()
-        newtest.shortDescription = lambda: newtest_desc
+        new_desc = "%s (%s)" % (test_desc, name)
+        test.shortDescription = lambda: new_desc
     for key, value in parameters.items():
-        setattr(newtest, key, value)
-    return newtest
+        if isinstance(value, SharedParameter):
+            value = value.view()
+        setattr(test, key, value)
+
+
+# The containers unittest and testtools keep per test instance and change
+# while the test runs.
+_PER_RUN_STATE = (
+    "_cleanups",
+    "_type_equality_funcs",
+    "_traceback_id_gens",
+    "_TestCase__exception_handlers",
+    "exception_handlers",
+)
+
+
+def _unshare_state(test):
+    # copy.copy leaves every clone sharing the containers of the original,
+    # such as the cleanup stack of unittest.TestCase; give each clone its own
+    # so that clones can be run concurrently. Only the state unittest and
+    # testtools own is copied - anything else, such as scenario parameters,
+    # is deliberately shared. Containers referenced under several names stay
+    # shared between those names. The CopyOnWrite views of shared parameters
+    # applied by an earlier scenario are per test, so each clone gets its own.
+    state = getattr(test, "__dict__", None)
+    if state is None:
+        return
+    for name, value in state.items():
+        if isinstance(value, CopyOnWrite):
+            state[name] = copy.copy(value)
+    copies = {}
+    for name in _PER_RUN_STATE:
+        value = state.get(name)
+        if type(value) in (list, dict):
+            fresh = copies.get(id(value))
+            if fresh is None:
+                fresh = copies[id(value)] = value.copy()
+            state[name] = fresh
+
+
+# Guards reading scenario iterables into tuples. Reentrant, as reading an
+# ExtendedScenarios freezes the iterables it is made from.
+_frozen_lock = threading.RLock()
+
+
+def _frozen_scenarios(scenarios):
+    """Return scenarios in a form that can be safely iterated repeatedly.
+
+    Lists are copied, so that changes made while tests are being expanded do
+    not affect the expansion. Other iterables, such as generators, are read
+    into a tuple; callers that may see the same iterable again keep the tuple
+    in its place, as _test_scenarios does.
+    """
+    if scenarios is None or isinstance(scenarios, (tuple, ScenarioTable)):
+        return scenarios
+    return tuple(scenarios)
+
+
+def _test_scenarios(test):
+    """Return the scenarios of test, a TestCase or TestCase class, frozen.
+
+    One-shot iterables, such as generators, are read once, the first time
+    they are seen, and the tuple read replaces them
+    as the scenarios attribute of the test or class that set it, so that
+    tests expanded later - or on another thread - still get every scenario.
+    """
+    scenarios = getattr(test, "scenarios", None)
+    if scenarios is None or isinstance(scenarios, _REITERABLE):
+        # Nothing to write back, so no lock is needed - nor wanted, as
+        # reading an ExtendedScenarios runs its extension functions.
+        return _frozen_scenarios(scenarios)
+    if isinstance(test, type):
+        owners = test.__mro__
+    else:
+        owners = (test,) + type(test).__mro__
+    with _frozen_lock:
+        for owner in owners:
+            scenarios = vars(owner).get("scenarios")
+            if scenarios is not None:
+                break
+        else:
+            return _frozen_scenarios(getattr(test, "scenarios", None))
+        frozen = _frozen_scenarios(scenarios)
+        if not isinstance(scenarios, _REITERABLE):
+            setattr(owner, "scenarios", frozen)
+        return frozen
+
+
+def _scenario_id_of(test):
+    base_id = _carried_scenario_id(test)
+    if base_id is None:
+        base_id = ScenarioId(test.id())
+    return base_id
 
 
 def apply_scenarios(scenarios, test):
@@ -64,7 +185,7 @@ def apply_scenarios(scenarios, test):
         yield apply_scenario(scenario, test)
 
 
-def generate_scenarios(test_or_suite):
+def generate_scenarios(test_or_suite, budget=None, profiler=None):
     """Yield the tests in test_or_suite with scenario multiplication done.
 
     TestCase objects with no scenarios specified are yielded unaltered. Tests
@@ -72,16 +193,92 @@ def generate_scenarios(test_or_suite):
     them by the scenarios they specified gets yielded.
 
     :param test_or_suite: A TestCase or TestSuite.
+    :param budget: An optional testscenarios.budget.ScenarioBudget. When
+        given, the scenarios of each test are put in the budget's priority
+        order, and each multiplied test is reported as skipped instead of run
+        once the budget is spent (see testscenarios.budget.apply_budget).
+    :param profiler: An optional testscenarios.profiling.ScenarioProfiler.
+        When given, each multiplied test is run under the profiler (see
+        testscenarios.profiling.apply_profiler).
     :return: A generator of tests - objects satisfying the TestCase protocol.
+
+    Scenarios using an implementation module that per_module_scenarios was
+    asked to skip when unavailable are never run. Instead each test made
+    from them reports itself as skipped, in its place among the scenarios,
+    or, for skip_unavailable="scenario", a single placeholder for each such
+    scenario and test class is yielded after all the other tests. That needs the
+    tests of the class to be expanded together, as load_tests_apply_scenarios
+    does; a scenario skipping a single test is reported for that test.
     """
+    # testtools is slow to import and only needed once tests are expanded.
+    from testtools import iterate_tests
+
+    if profiler is not None:
+        from testscenarios.profiling import apply_profiler
+
+    aggregated = {}
     for test in iterate_tests(test_or_suite):
-        scenarios = getattr(test, "scenarios", None)
+        scenarios = _test_scenarios(test)
         if scenarios:
-            for newtest in apply_scenarios(scenarios, test):
+            if budget is not None:
+                scenarios = budget.prioritise(test, scenarios)
+            applied = []
+            for scenario in scenarios:
+                module = _unavailable_module(scenario)
+                if module is not None and module.skip == "scenario":
+                    key = (scenario[0], id(module), type(test))
+                    aggregated.setdefault(key, (scenario, module, []))[2].append(test)
+                else:
+                    applied.append(scenario)
+            newtests = apply_scenarios(applied, test)
+            for scenario, newtest in zip(applied, newtests):
                 newtest.scenarios = None
+                module = _unavailable_module(scenario)
+                if module is not None:
+                    yield _apply_skip(newtest, module.reason)
+                    continue
+                if profiler is not None:
+                    apply_profiler(newtest, profiler)
+                if budget is not None:
+                    apply_budget(newtest, budget)
                 yield newtest
         else:
             yield test
+    # A skip covering a whole scenario is only reported as such when it
+    # covers several tests; expanding a single test, as WithScenarios does,
+    # reports the skip for that test.
+    for (name, _, test_class), (scenario, module, tests) in aggregated.items():
+        if len(tests) == 1:
+            newtest = apply_scenario(scenario, tests[0])
+            newtest.scenarios = None
+            yield _apply_skip(newtest, module.reason)
+            continue
+        base = "%s.%s" % (test_class.__module__, test_class.__qualname__)
+        placeholder = UnavailableScenarioTest(ScenarioId(base).applied(name), module)
+        placeholder.skipped_ids.extend(test.id() for test in tests)
+        yield placeholder
+
+
+def _apply_skip(test, reason):
+    # Make test report itself as skipped instead of running, as apply_budget
+    # does once the budget is spent. The test keeps its class, so its class
+    # and module fixtures run as they do for the other tests of the class.
+    def skipped_run(result=None):
+        if result is None:
+            result = test.defaultTestResult()
+        result.startTest(test)
+        result.addSkip(test, reason)
+        result.stopTest(test)
+        return result
+
+    def skipped_debug():
+        import unittest
+
+        raise unittest.SkipTest(reason)
+
+    test.run = skipped_run
+    test.debug = skipped_debug
+    return test
 
 
 def load_tests_apply_scenarios(*params):
@@ -118,19 +315,352 @@ def multiply_scenarios(*scenarios):
         scenarios, with the names concatenated and the parameters
         merged together.
     """
-    result = []
     scenario_lists = map(list, scenarios)
-    for combination in product(*scenario_lists):
-        names, parameters = zip(*combination)
-        scenario_name = ",".join(names)
-        scenario_parameters = {}
-        for parameter in parameters:
-            scenario_parameters.update(parameter)
-        result.append((scenario_name, scenario_parameters))
+    return [_combine_scenarios(combination) for combination in product(*scenario_lists)]
+
+
+def _combine_scenarios(combination):
+    names, parameters = zip(*combination)
+    scenario_name = ",".join(names)
+    scenario_parameters = {}
+    for parameter in parameters:
+        scenario_parameters.update(parameter)
+    return (scenario_name, scenario_parameters)
+
+
+class ExtendedScenarios:
+    """Scenarios extended by scenarios that depend on them ("X using Y").
+
+    Each scenario is extended by every scenario of the first extension, each
+    of those by every scenario of the second, and so on, like
+    multiply_scenarios; but an extension can be a function of the parameters
+    built up so far, returning the scenarios to extend them with. For
+    instance, the connection scenarios to use can depend on which database
+    backend the outer scenario chose.
+
+    The names of the combined scenarios are joined with ",", and their
+    parameters merged, as multiply_scenarios does. Nothing is evaluated until
+    the scenarios are iterated over, and only the final, combined, scenarios
+    are produced, so a test is cloned once for each of them however deep the
+    extensions go.
+    """
+
+    def __init__(self, scenarios, *extensions):
+        """Create an ExtendedScenarios.
+
+        :param scenarios: The outer scenarios: an iterable of scenarios.
+        :param extensions: Iterables of scenarios, or functions taking the
+            merged parameters of a scenario and returning an iterable of
+            scenarios to extend it with. The parameters passed must not be
+            modified.
+        """
+        self.scenarios = scenarios
+        self.extensions = extensions
+        self._frozen = False
+
+    def __iter__(self):
+        self._freeze()
+        for name, parameters in _frozen_scenarios(self.scenarios):
+            yield from self._extend(name, parameters, self.extensions)
+
+    def _freeze(self):
+        # Read one-shot iterables once, and keep what they gave, so that
+        # every iteration sees the same scenarios.
+        if self._frozen:
+            return
+        with _frozen_lock:
+            if self._frozen:
+                return
+            if not isinstance(self.scenarios, _REITERABLE):
+                self.scenarios = _frozen_scenarios(self.scenarios)
+            self.extensions = tuple(
+                extension
+                if callable(extension) or isinstance(extension, _REITERABLE)
+                else _frozen_scenarios(extension)
+                for extension in self.extensions
+            )
+            self._frozen = True
+
+    def _extend(self, name, parameters, extensions):
+        if not extensions:
+            yield (name, parameters)
+            return
+        extension = extensions[0]
+        if callable(extension):
+            inner = extension(parameters)
+        else:
+            inner = _frozen_scenarios(extension)
+        for inner_name, inner_parameters in inner:
+            merged = dict(parameters)
+            merged.update(inner_parameters)
+            yield from self._extend(name + "," + inner_name, merged, extensions[1:])
+
+    # No __len__: list() and tuple() would call it as a length hint, running
+    # every extension twice.
+
+    def __bool__(self):
+        for _ in self:
+            return True
+        return False
+
+    def __repr__(self):
+        return "ExtendedScenarios(%r, %s)" % (
+            self.scenarios,
+            ", ".join(map(repr, self.extensions)),
+        )
+
+
+class DeduplicatedScenarios(list):
+    """The scenarios left by deduplicate_scenarios.
+
+    :ivar aliases: A dict mapping the name of each scenario kept to the names
+        of the scenarios found to be equivalent to it, in their original
+        order. Scenarios without duplicates have no entry.
+    :ivar original_count: The number of scenarios before deduplication.
+    """
+
+    def __init__(self, scenarios, aliases, original_count):
+        super().__init__(scenarios)
+        self.aliases = aliases
+        self.original_count = original_count
+
+    @property
+    def removed(self):
+        """The number of scenarios removed."""
+        return self.original_count - len(self)
+
+    def saved_time(self, history):
+        """Estimate the time saved by not running the removed scenarios.
+
+        :param history: A testscenarios.budget.ScenarioHistory. The recorded
+            durations of tests with a removed scenario applied last are
+            summed.
+        :return: The estimated time saved, in seconds.
+        """
+        removed = set()
+        for names in self.aliases.values():
+            removed.update(names)
+        saved = 0.0
+        for test_id in history.test_ids():
+            names = parse_scenario_id(test_id).unseeded().names
+            if names and names[-1] in removed:
+                saved += history.get(test_id)[0]
+        return saved
+
+    def report(self, history=None):
+        """Return a one line summary of the deduplication.
+
+        :param history: An optional ScenarioHistory, used to include an
+            estimate of the time saved.
+        """
+        summary = "deduplicated %d scenarios to %d, removing %d" % (
+            self.original_count,
+            len(self),
+            self.removed,
+        )
+        if history is not None:
+            summary += " (saving about %.3gs)" % (self.saved_time(history),)
+        return summary
+
+
+def deduplicate_scenarios(scenarios, key=None, irrelevant_when=None):
+    """Collapse scenarios which are equivalent in effect.
+
+    Scenarios are equivalent when their parameters are equal, leaving out
+    any parameters which are irrelevant to that scenario. The first of each
+    set of equivalent scenarios is kept, and the names of the others are
+    recorded as its aliases. Run this before the scenarios are applied, so
+    that no test is cloned for the duplicates.
+
+    Parameter values are compared by equality when they are hashable, and by
+    identity otherwise.
+
+    :param scenarios: An iterable of scenarios.
+    :param key: An optional function taking the relevant parameters of a
+        scenario, as a dict, and returning a hashable key. Scenarios with
+        equal keys are equivalent.
+    :param irrelevant_when: An optional dict mapping parameter names to
+        functions taking the parameters of a scenario and returning True
+        when that parameter has no effect in that scenario, for instance
+        {'pool_size': lambda p: p['backend'] == 'sqlite'}.
+    :return: A DeduplicatedScenarios list.
+    """
+    kept = {}
+    aliases = {}
+    count = 0
+    for name, parameters in scenarios:
+        count += 1
+        relevant = parameters
+        if irrelevant_when:
+            relevant = {
+                parameter: value
+                for parameter, value in parameters.items()
+                if not (
+                    parameter in irrelevant_when
+                    and irrelevant_when[parameter](parameters)
+                )
+            }
+        if key is None:
+            scenario_key = _parameters_key(relevant)
+        else:
+            scenario_key = key(relevant)
+        first = kept.get(scenario_key)
+        if first is None:
+            kept[scenario_key] = (name, parameters)
+        else:
+            aliases.setdefault(first[0], []).append(name)
+    return DeduplicatedScenarios(kept.values(), aliases, count)
+
+
+def _parameters_key(parameters):
+    items = []
+    for parameter, value in parameters.items():
+        try:
+            hash(value)
+        except TypeError:
+            value = id(value)
+            kind = None
+        else:
+            kind = type(value)
+        items.append((parameter, kind, value))
+    items.sort(key=_parameter_name)
+    return tuple(items)
+
+
+def _parameter_name(item):
+    return item[0]
+
+
+def _sample_seed(seed):
+    if seed is None:
+        seed = os.environ.get("TESTSCENARIOS_SEED")
+        if seed is None:
+            import random
+
+            return random.SystemRandom().randrange(2**32)
+    return int(seed)
+
+
+def _sample_size(population, count, fraction):
+    if count is None and fraction is None:
+        return population
+    if count is not None and fraction is not None:
+        raise ValueError("count and fraction cannot both be given")
+    if fraction is not None:
+        if not 0 <= fraction <= 1:
+            raise ValueError("fraction must be between 0 and 1")
+        count = math.ceil(population * fraction)
+    return min(count, population)
+
+
+def _seeded_scenario(scenario, seed):
+    # The seed is carried as a parameter, which survives multiplying and
+    # extending the scenario, and apply_scenario puts it in the ScenarioId.
+    name, parameters = scenario
+    parameters = dict(parameters)
+    parameters["scenario_seed"] = seed
+    return (name, parameters)
+
+
+def sample_scenarios(scenarios, count=None, fraction=None, seed=None):
+    """Draw a reproducible random subset of scenarios.
+
+    When a sample is actually drawn, each scenario gets a scenario_seed
+    parameter holding the seed. apply_scenario records it in the ScenarioId,
+    so it shows up at the end of the test ids, like ``test(a)(seed=N)``,
+    without becoming part of the scenario names, and the same subset can be
+    run again by passing that seed. When
+    neither count nor fraction is given, or the sample would contain every
+    scenario, the scenarios are returned unaltered.
+
+    Sequences such as ScenarioTable are sampled by index, so only the chosen
+    scenarios are read.
+
+    :param scenarios: An iterable of scenarios.
+    :param count: The number of scenarios to draw.
+    :param fraction: The fraction of the scenarios to draw, between 0 and 1.
+    :param seed: An integer seed. If None, the TESTSCENARIOS_SEED environment
+        variable is used if set, and otherwise a random seed is chosen.
+    :return: A list of scenarios, in their original order.
+    """
+    if not (hasattr(scenarios, "__getitem__") and hasattr(scenarios, "__len__")):
+        scenarios = list(scenarios)
+    size = _sample_size(len(scenarios), count, fraction)
+    if size == len(scenarios):
+        return list(scenarios)
+    import random
+
+    seed = _sample_seed(seed)
+    indices = sorted(random.Random(seed).sample(range(len(scenarios)), size))
+    return [_seeded_scenario(scenarios[index], seed) for index in indices]
+
+
+def sample_multiply_scenarios(
+    *scenarios, count=None, fraction=None, seed=None, stratified=False
+):
+    """Draw a reproducible random subset of the product of some scenarios.
+
+    This is equivalent to sampling the result of multiply_scenarios, but only
+    the chosen combinations are built, so the full product is never held in
+    memory.
+
+    :param scenarios: Two or more iterables of scenarios.
+    :param count: The number of combinations to draw.
+    :param fraction: The fraction of the combinations to draw, between 0 and 1.
+    :param seed: An integer seed, as for sample_scenarios.
+    :param stratified: If True, the sample is chosen so that every scenario of
+        every dimension is used at least once (provided the sample is at least
+        as large as the largest dimension), and the rest of the sample is
+        drawn uniformly.
+    :return: A list of compound scenarios, in multiply_scenarios order, named
+        as by sample_scenarios.
+    """
+    scenario_lists = [list(dimension) for dimension in scenarios]
+    sizes = [len(dimension) for dimension in scenario_lists]
+    population = math.prod(sizes)
+    size = _sample_size(population, count, fraction)
+    if size == population:
+        return multiply_scenarios(*scenario_lists)
+    import random
+
+    seed = _sample_seed(seed)
+    rng = random.Random(seed)
+    chosen = set()
+    if stratified and size and sizes:
+        # Give each dimension a column of positions made of back to back
+        # shuffles of all its scenarios. Each row across the columns is one
+        # combination, and the first n rows use min(n, size) scenarios of
+        # every dimension.
+        rows = min(size, max(sizes))
+        columns = []
+        for dimension_size in sizes:
+            column = []
+            while len(column) < rows:
+                shuffle = list(range(dimension_size))
+                rng.shuffle(shuffle)
+                column.extend(shuffle)
+            columns.append(column)
+        for row in zip(*columns):
+            index = 0
+            for position, dimension_size in zip(row, sizes):
+                index = index * dimension_size + position
+            chosen.add(index)
+    for index in rng.sample(range(population), min(population, size + len(chosen))):
+        if len(chosen) == size:
+            break
+        chosen.add(index)
+    result = []
+    for index in sorted(chosen):
+        combination = []
+        for dimension, dimension_size in zip(reversed(scenario_lists), reversed(sizes)):
+            index, position = divmod(index, dimension_size)
+            combination.append(dimension[position])
+        combination.reverse()
+        result.append(_seeded_scenario(_combine_scenarios(combination), seed))
     return result
 
 
-def per_module_scenarios(attribute_name, modules):
+def per_module_scenarios(attribute_name, modules, skip_unavailable=None):
     """Generate scenarios for available implementation modules.
 
     This is typically used when there is a subsystem implemented, for
@@ -140,8 +670,9 @@ def per_module_scenarios(attribute_name, modules):
     Note: if the module can't be loaded, the sys.exc_info() tuple for the
     exception raised during import of the module is used instead of the module
     object. A common idiom is to check in setUp for that and raise a skip or
-    error for that case. No special helpers are supplied in testscenarios as
-    yet.
+    error for that case. Alternatively, pass skip_unavailable to have
+    generate_scenarios report the skip without setting up or running any
+    tests for that scenario.
 
     :param attribute_name: A name to be set in the scenario parameter
         dictionary (and thence onto the test instance) pointing to the
@@ -151,12 +682,254 @@ def per_module_scenarios(attribute_name, modules):
         the short name is something like 'python' to put in the
         scenario name, and the long name is a fully-qualified Python module
         name.
+
+    :param skip_unavailable: None to leave unavailable modules to the tests,
+        "test" to have generate_scenarios report each test of an unavailable
+        module's scenario as skipped, or "scenario" to have it report a single
+        skip for each such scenario covering all the tests of a class that
+        are expanded together. TestWithScenarios expands each test on its
+        own, so there each test is reported as skipped. In both cases the
+        import exception is given as an UnavailableModule.
     """
+    if skip_unavailable not in (None, "test", "scenario"):
+        raise ValueError(
+            "skip_unavailable must be None, 'test' or 'scenario', not %r"
+            % (skip_unavailable,)
+        )
     scenarios = []
     for short_name, module_name in modules:
         try:
             mod = __import__(module_name, {}, {}, [""])
         except BaseException:
             mod = sys.exc_info()
+            if skip_unavailable is not None:
+                mod = UnavailableModule(mod, module_name, skip_unavailable)
         scenarios.append((short_name, {attribute_name: mod}))
     return scenarios
+
+
+class UnavailableModule(tuple):
+    """The sys.exc_info() tuple of a module that could not be imported.
+
+    per_module_scenarios uses this in place of the module when asked to skip
+    unavailable modules. It is still the exc_info tuple, so checks written
+    for the plain tuple keep working.
+
+    :ivar module_name: The name of the module that could not be imported.
+    :ivar skip: How generate_scenarios reports the skip: "test" or
+        "scenario".
+    """
+
+    def __new__(cls, exc_info, module_name, skip="test"):
+        self = super().__new__(cls, exc_info)
+        self.module_name = module_name
+        self.skip = skip
+        return self
+
+    @property
+    def reason(self):
+        exc_type, exc_value, _ = self
+        return "%s unavailable: %s: %s" % (
+            self.module_name,
+            exc_type.__name__,
+            exc_value,
+        )
+
+
+def _unavailable_module(scenario):
+    for value in scenario[1].values():
+        if isinstance(value, UnavailableModule):
+            return value
+    return None
+
+
+class UnavailableScenarioTest:
+    """Reports a scenario of an unavailable module as skipped.
+
+    For skip_unavailable="scenario", generate_scenarios yields one of these
+    for each scenario whose implementation module is unavailable, in place
+    of all the tests of a class it would have been applied to. Running one
+    only reports the skip: no test is set up.
+
+    :ivar scenario_id: The ScenarioId of the skipped scenario.
+    :ivar module: The UnavailableModule.
+    :ivar skipped_ids: The ids of the tests it stands for.
+    """
+
+    def __init__(self, scenario_id, module):
+        self.scenario_id = scenario_id
+        self.module = module
+        self.skipped_ids = []
+        self.id = scenario_id.__str__
+
+    @property
+    def reason(self):
+        return "%s (%d tests)" % (self.module.reason, len(self.skipped_ids))
+
+    def countTestCases(self):
+        return 1
+
+    def shortDescription(self):
+        return None
+
+    def run(self, result=None):
+        if result is None:
+            import unittest
+
+            result = unittest.TestResult()
+        result.startTest(self)
+        result.addSkip(self, self.reason)
+        result.stopTest(self)
+        return result
+
+    __call__ = run
+
+    def debug(self):
+        import unittest
+
+        raise unittest.SkipTest(self.reason)
+
+    def __str__(self):
+        return self.id()
+
+    def __repr__(self):
+        return "<UnavailableScenarioTest %s>" % (self.id(),)
+
+
+# ScenarioTable files start with a header of the magic bytes and the number of
+# scenarios, followed by count + 1 record offsets and then the records. Each
+# record is the length of the UTF-8 encoded name, the name itself, and the
+# parameters encoded as a JSON object.
+_TABLE_MAGIC = b"TSCNTBL1"
+_TABLE_HEADER = struct.Struct("<8sQ")
+_TABLE_OFFSET = struct.Struct("<Q")
+_TABLE_NAME_LENGTH = struct.Struct("<I")
+
+
+class ScenarioTable:
+    """A sequence of scenarios read lazily from a memory mapped file.
+
+    The file is written by write_scenario_table. Nothing is read until the
+    table is first used, and each scenario is decoded only when it is indexed
+    or iterated over, so a large table costs nothing at import time and only
+    the rows actually run are ever decoded.
+
+    A ScenarioTable can be used anywhere a scenario list can, such as the
+    scenarios attribute of a test.
+    """
+
+    def __init__(self, path):
+        """Create a ScenarioTable.
+
+        :param path: The path of a file written by write_scenario_table.
+        """
+        self.path = path
+        self._map = None
+        self._count = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        table = self._map
+        if table is not None:
+            return table
+        with self._lock:
+            if self._map is None:
+                with open(self.path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size < _TABLE_HEADER.size:
+                        raise ValueError("%s is not a scenario table" % (self.path,))
+                    table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    magic, count = _TABLE_HEADER.unpack_from(table)
+                    if magic != _TABLE_MAGIC:
+                        raise ValueError("%s is not a scenario table" % (self.path,))
+                    offsets_end = _TABLE_HEADER.size + (count + 1) * _TABLE_OFFSET.size
+                    if offsets_end > len(table):
+                        raise ValueError(
+                            "%s is a truncated scenario table" % (self.path,)
+                        )
+                except BaseException:
+                    table.close()
+                    raise
+                self._count = count
+                self._map = table
+            return self._map
+
+    def _record(self, index):
+        table = self._open()
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("scenario table index out of range")
+        position = _TABLE_HEADER.size + index * _TABLE_OFFSET.size
+        (start,) = _TABLE_OFFSET.unpack_from(table, position)
+        (end,) = _TABLE_OFFSET.unpack_from(table, position + _TABLE_OFFSET.size)
+        name_start = start + _TABLE_NAME_LENGTH.size
+        if not name_start <= end <= len(table):
+            raise ValueError("%s is a truncated scenario table" % (self.path,))
+        (name_length,) = _TABLE_NAME_LENGTH.unpack_from(table, start)
+        name_end = name_start + name_length
+        if name_end > end:
+            raise ValueError("%s is a truncated scenario table" % (self.path,))
+        return table, name_start, name_end, end
+
+    def name(self, index):
+        """Return the name of a scenario without decoding its parameters."""
+        table, name_start, name_end, _ = self._record(index)
+        return table[name_start:name_end].decode("utf-8")
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        import json
+
+        table, name_start, name_end, end = self._record(index)
+        name = table[name_start:name_end].decode("utf-8")
+        return (name, json.loads(table[name_end:end]))
+
+    def __len__(self):
+        self._open()
+        return self._count
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        """Release the memory map. The table reopens it if used again."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+def write_scenario_table(path, scenarios):
+    """Write scenarios to a file that ScenarioTable can read.
+
+    :param path: The path to write to. Any existing file is replaced.
+    :param scenarios: An iterable of scenarios. The parameters of each
+        scenario must be serialisable as a JSON object.
+    """
+    import json
+
+    records = []
+    for name, parameters in scenarios:
+        encoded_name = name.encode("utf-8")
+        records.append(
+            _TABLE_NAME_LENGTH.pack(len(encoded_name))
+            + encoded_name
+            + json.dumps(parameters, separators=(",", ":")).encode("utf-8")
+        )
+    offset = _TABLE_HEADER.size + (len(records) + 1) * _TABLE_OFFSET.size
+    with open(path, "wb") as f:
+        f.write(_TABLE_HEADER.pack(_TABLE_MAGIC, len(records)))
+        for record in records:
+            f.write(_TABLE_OFFSET.pack(offset))
+            offset += len(record)
+        f.write(_TABLE_OFFSET.pack(offset))
+        for record in records:
+            f.write(record)
+
+
+# Scenario iterables which can be iterated repeatedly, and so are never
+# replaced by the tuple read from them.
+_REITERABLE = (list, tuple, ScenarioTable, ExtendedScenarios)
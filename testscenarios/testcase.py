@@ -22,7 +22,7 @@ __all__ = [
 import unittest
 
 
-from testscenarios.scenarios import generate_scenarios
+from testscenarios.scenarios import _test_scenarios, generate_scenarios
 
 _doc = """
     When a test object which inherits from WithScenarios is run, and there is a
@@ -30,6 +30,12 @@ _doc = """
     run method into one test per scenario. For this to work reliably the
     WithScenarios.run method must not be overriden in a subclass (or overridden
     compatibly with WithScenarios).
+
+    If the scenario_budget attribute is set to a
+    testscenarios.budget.ScenarioBudget, the scenarios are run in the budget's
+    priority order until it is spent, and the rest are reported as skipped.
+    If the scenario_profiler attribute is set to a
+    testscenarios.profiling.ScenarioProfiler, each scenario is run under it.
     """
 
 
@@ -40,8 +46,11 @@ class WithScenarios(object):
         + _doc
     )
 
+    scenario_budget = None
+    scenario_profiler = None
+
     def _get_scenarios(self):
-        return getattr(self, "scenarios", None)
+        return _test_scenarios(self)
 
     def countTestCases(self):
         scenarios = self._get_scenarios()
@@ -61,7 +70,9 @@ class WithScenarios(object):
     def run(self, result=None):
         scenarios = self._get_scenarios()
         if scenarios:
-            for test in generate_scenarios(self):
+            for test in generate_scenarios(
+                self, budget=self.scenario_budget, profiler=self.scenario_profiler
+            ):
                 test.run(result)
             return
         else:
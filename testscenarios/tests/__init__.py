@@ -28,6 +28,13 @@ def test_suite():
 
 def load_tests(loader, standard_tests, pattern):
     test_modules = [
+        "benchmark",
+        "budget",
+        "ids",
+        "imports",
+        "parameters",
+        "profiling",
+        "pytest_plugin",
         "testcase",
         "scenarios",
     ]
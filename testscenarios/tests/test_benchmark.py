@@ -0,0 +1,148 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+import json
+import unittest
+from io import StringIO
+
+import testtools
+
+from testscenarios.benchmark import (
+    BenchmarkStats,
+    TestBenchmarkWithScenarios,
+    format_comparison,
+)
+from testscenarios.scenarios import generate_scenarios
+from testscenarios.tests.test_scenarios import make_temp_path
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBenchmarkStats(testtools.TestCase):
+    def test_statistics(self):
+        stats = BenchmarkStats([1.0, 2.0, 3.0, 4.0, 5.0], 10)
+        self.assertEqual(3.0, stats.median)
+        self.assertEqual(3.0, stats.iqr)
+        self.assertAlmostEqual(1 / 3.0, stats.ops_per_second)
+        self.assertEqual(10, stats.as_dict()["iterations"])
+
+    def test_single_sample(self):
+        self.assertEqual(0.0, BenchmarkStats([1.0], 1).iqr)
+
+    def test_format_comparison(self):
+        table = format_comparison(
+            "test_hash",
+            [("md5", BenchmarkStats([2e-6], 1)), ("sha1", BenchmarkStats([3e-6], 1))],
+        )
+        self.assertEqual(
+            "test_hash\n"
+            "  scenario  median  IQR  ops/sec  relative\n"
+            "  md5          2us  0ns   500000      1.00\n"
+            "  sha1         3us  0ns   333333      1.50\n",
+            table,
+        )
+
+
+class TestBenchmarkScenarios(testtools.TestCase):
+    def make_test(self, **attributes):
+        clock = FakeClock()
+        calls = []
+
+        class ReferenceTest(TestBenchmarkWithScenarios):
+            scenarios = [("fast", {"cost": 1.0}), ("slow", {"cost": 2.0})]
+            benchmark_timer = clock
+            benchmark_min_time = 2.0
+            benchmark_repeat = 3
+            benchmark_stream = StringIO()
+
+            def setUp(self):
+                super().setUp()
+                calls.append("setUp")
+
+            def test_body(self):
+                calls.append(self.cost)
+                clock.now += self.cost
+
+        if attributes:
+            ReferenceTest = type("ReferenceTest", (ReferenceTest,), attributes)
+        return ReferenceTest("test_body"), calls
+
+    def test_runs_each_scenario_repeatedly(self):
+        test, calls = self.make_test()
+        result = unittest.TestResult()
+        test.run(result)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(2, result.testsRun)
+        # For each scenario: one setUp and one warmup call, then calibration
+        # takes 1 call as the first sample for slow, and needs 1 then 2 calls
+        # for fast, followed by two more samples.
+        self.assertEqual(["setUp"] + [1.0] * 8 + ["setUp"] + [2.0] * 4, calls)
+        table = test.benchmark_stream.getvalue()
+        self.assertIn("fast", table)
+        self.assertIn("slow", table)
+        self.assertIn("2.00", table)
+
+    def test_results_and_baseline(self):
+        path = make_temp_path(self, exists=False)
+        test, _ = self.make_test(benchmark_results=path)
+        test.run(unittest.TestResult())
+        with open(path) as f:
+            results = json.load(f)
+        self.assertEqual(
+            {test.id() + "(fast)": 1.0, test.id() + "(slow)": 2.0},
+            {key: value["median"] for key, value in results.items()},
+        )
+        results[test.id() + "(slow)"]["median"] = 1.5
+        with open(path, "w") as f:
+            json.dump(results, f)
+        test, _ = self.make_test(benchmark_baseline=path)
+        result = unittest.TestResult()
+        test.run(result)
+        self.assertEqual(1, len(result.failures))
+        self.assertTrue(result.failures[0][0].id().endswith("(slow)"))
+        self.assertIn("benchmark regressed", result.failures[0][1])
+
+    def test_results_written_for_expanded_tests(self):
+        path = make_temp_path(self, exists=False)
+        test, _ = self.make_test(benchmark_results=path)
+        tests = list(generate_scenarios(test))
+        tests[1].run(unittest.TestResult())
+        with open(path) as f:
+            self.assertEqual([test.id() + "(slow)"], list(json.load(f)))
+        self.assertEqual("", test.benchmark_stream.getvalue())
+
+    def test_expected_failure_kept(self):
+        class ReferenceTest(TestBenchmarkWithScenarios):
+            scenarios = [("a", {}), ("b", {})]
+            benchmark_timer = FakeClock()
+            benchmark_min_time = 0.0
+            benchmark_repeat = 1
+            benchmark_stream = StringIO()
+
+            @unittest.expectedFailure
+            def test_body(self):
+                self.fail("known slow path")
+
+        result = unittest.TestResult()
+        ReferenceTest("test_body").run(result)
+        self.assertEqual([], result.failures)
+        self.assertEqual(2, len(result.expectedFailures))
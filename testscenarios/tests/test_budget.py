@@ -0,0 +1,229 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+import os
+import unittest
+
+import testtools
+
+import testscenarios
+from testscenarios.budget import ScenarioBudget, ScenarioHistory
+from testscenarios.scenarios import apply_scenario, generate_scenarios
+from testscenarios.tests.test_scenarios import make_temp_path
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestScenarioHistory(testtools.TestCase):
+    def test_save_and_load(self):
+        path = make_temp_path(self, exists=False)
+        history = ScenarioHistory(path)
+        self.assertEqual(None, history.get("test(a)"))
+        history.record("test(a)", 1.5, True)
+        history.save()
+        self.assertEqual((1.5, True), ScenarioHistory(path).get("test(a)"))
+
+
+class TestScenarioBudget(testtools.TestCase):
+    class ReferenceTest(unittest.TestCase):
+        def test_pass(self):
+            pass
+
+    def test_prioritise(self):
+        test = self.ReferenceTest("test_pass")
+        base_id = test.id()
+        history = ScenarioHistory()
+        history.record(base_id + "(a,x)", 5.0, False)
+        history.record(base_id + "(a,y)", 1.0, False)
+        history.record(base_id + "(b,x)", 9.0, True)
+        history.record(base_id + "(b,y)", 0.5, False)
+        scenarios = [(name, {}) for name in ("a,x", "a,y", "b,x", "b,y")]
+        budget = ScenarioBudget(10, history=history)
+        ordered = [name for name, _ in budget.prioritise(test, scenarios)]
+        # b,x failed last time; b,y and a,y, cheapest first, each add a
+        # scenario not yet used; a,x adds nothing new.
+        self.assertEqual(["b,x", "b,y", "a,y", "a,x"], ordered)
+
+    def test_history_ignores_sampling_seed(self):
+        class ReferenceTest(unittest.TestCase):
+            def test_pass(self):
+                pass
+
+        test = ReferenceTest("test_pass")
+        history = ScenarioHistory()
+        history.record(test.id() + "(a)", 5.0, False)
+        history.record(test.id() + "(b)", 1.0, False)
+        scenarios = [("a", {"scenario_seed": 1}), ("b", {"scenario_seed": 1})]
+        budget = ScenarioBudget(10, history=history)
+        ordered = [name for name, _ in budget.prioritise(test, scenarios)]
+        self.assertEqual(["b", "a"], ordered)
+        budget.run(apply_scenario(scenarios[0], test), unittest.TestResult())
+        self.assertNotEqual((5.0, False), history.get(test.id() + "(a)"))
+        self.assertEqual([test.id() + "(a)", test.id() + "(b)"], history.test_ids())
+
+    def test_remaining_scenarios_skipped(self):
+        clock = FakeClock()
+
+        class ReferenceTest(unittest.TestCase):
+            scenarios = [("1", {}), ("2", {}), ("3", {})]
+
+            def test_slow(self):
+                clock.now += 2
+
+        budget = ScenarioBudget(3, clock=clock)
+        result = unittest.TestResult()
+        test = ReferenceTest("test_slow")
+        suite = unittest.TestSuite(generate_scenarios(test, budget=budget))
+        self.assertEqual(3, suite.countTestCases())
+        suite.run(result)
+        self.assertEqual(3, result.testsRun)
+        self.assertEqual(
+            ["scenario time budget of 3s exhausted"],
+            [reason for _, reason in result.skipped],
+        )
+        self.assertTrue(result.skipped[0][0].id().endswith("test_slow(3)"))
+        self.assertEqual((2, False), budget.history.get(test.id() + "(1)"))
+
+    def test_shared_budget_spans_tests(self):
+        clock = FakeClock()
+
+        class ReferenceTest(unittest.TestCase):
+            scenarios = [("1", {}), ("2", {})]
+
+            def test_a(self):
+                clock.now += 2
+
+            def test_b(self):
+                clock.now += 2
+
+        suite = unittest.TestLoader().loadTestsFromTestCase(ReferenceTest)
+        for per_test, skipped in ((False, 2), (True, 0)):
+            clock.now = 0.0
+            budget = ScenarioBudget(3, per_test=per_test, clock=clock)
+            result = unittest.TestResult()
+            unittest.TestSuite(generate_scenarios(suite, budget=budget)).run(result)
+            self.assertEqual(4, result.testsRun)
+            self.assertEqual(skipped, len(result.skipped))
+
+    def test_clock_starts_with_first_test_run(self):
+        clock = FakeClock()
+
+        class ReferenceTest(unittest.TestCase):
+            scenarios = [("1", {}), ("2", {}), ("3", {})]
+
+            def test_slow(self):
+                clock.now += 2
+
+        budget = ScenarioBudget(3, clock=clock)
+        tests = list(generate_scenarios(ReferenceTest("test_slow"), budget=budget))
+        clock.now = 100.0
+        result = unittest.TestResult()
+        # Reordered and filtered, as a runner might.
+        unittest.TestSuite([tests[2], tests[1]]).run(result)
+        self.assertEqual(2, result.testsRun)
+        self.assertEqual([], result.skipped)
+
+    def test_history_saved_once(self):
+        path = make_temp_path(self, exists=False)
+
+        class ReferenceTest(unittest.TestCase):
+            scenarios = [("1", {}), ("2", {}), ("3", {})]
+
+            def test_pass(self):
+                pass
+
+        budget = ScenarioBudget(10, history=path)
+        tests = list(generate_scenarios(ReferenceTest("test_pass"), budget=budget))
+        unittest.TestSuite(tests).run(unittest.TestResult())
+        # Nothing is written while the tests run.
+        self.assertFalse(os.path.exists(path))
+        budget.save()
+        self.assertEqual(3, len(ScenarioHistory(path).test_ids()))
+        self.assertFalse(os.path.exists(path + ".tmp"))
+
+    def test_history_saved_every_interval(self):
+        path = make_temp_path(self, exists=False)
+
+        class ReferenceTest(unittest.TestCase):
+            scenarios = [("1", {}), ("2", {})]
+
+            def test_pass(self):
+                pass
+
+        budget = ScenarioBudget(10, history=path, save_interval=0)
+        tests = list(generate_scenarios(ReferenceTest("test_pass"), budget=budget))
+        tests[0].run(unittest.TestResult())
+        self.assertIsNotNone(ScenarioHistory(path).get(tests[0].id()))
+
+    def test_failure_recorded(self):
+        class ReferenceTest(unittest.TestCase):
+            scenarios = [("1", {})]
+
+            def test_fail(self):
+                self.fail("oops")
+
+        budget = ScenarioBudget(10)
+        (test,) = generate_scenarios(ReferenceTest("test_fail"), budget=budget)
+        self.assertIsInstance(test, ReferenceTest)
+        test.run(unittest.TestResult())
+        self.assertTrue(budget.history.get(test.id())[1])
+
+    def test_class_fixtures_run(self):
+        calls = []
+
+        class ReferenceTest(unittest.TestCase):
+            scenarios = [("1", {}), ("2", {})]
+
+            @classmethod
+            def setUpClass(cls):
+                calls.append("setUpClass")
+
+            @classmethod
+            def tearDownClass(cls):
+                calls.append("tearDownClass")
+
+            def test_pass(self):
+                calls.append(self.id())
+
+        budget = ScenarioBudget(10)
+        result = unittest.TestResult()
+        tests = generate_scenarios(ReferenceTest("test_pass"), budget=budget)
+        unittest.TestSuite(tests).run(result)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual("setUpClass", calls[0])
+        self.assertEqual("tearDownClass", calls[-1])
+        self.assertEqual(4, len(calls))
+
+    def test_with_scenarios_budget(self):
+        clock = FakeClock()
+
+        class ReferenceTest(testscenarios.TestWithScenarios):
+            scenarios = [("1", {}), ("2", {})]
+            scenario_budget = ScenarioBudget(1, clock=clock)
+
+            def test_slow(self):
+                clock.now += 1
+
+        result = unittest.TestResult()
+        ReferenceTest("test_slow").run(result)
+        self.assertEqual(2, result.testsRun)
+        self.assertEqual(1, len(result.skipped))
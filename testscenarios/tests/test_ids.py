@@ -0,0 +1,103 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+import unittest
+
+import testtools
+
+from testscenarios.ids import ScenarioId, parse_scenario_id, scenario_id
+from testscenarios.scenarios import apply_scenario, multiply_scenarios
+
+
+class TestScenarioId(testtools.TestCase):
+    def test_renders_lazily(self):
+        structured = ScenarioId("pkg.Test.test_x", ("a,b", "c"))
+        self.assertEqual(None, structured._rendered)
+        self.assertEqual("pkg.Test.test_x(a,b)(c)", str(structured))
+        self.assertEqual("pkg.Test.test_x(a,b)(c)", structured._rendered)
+
+    def test_components(self):
+        structured = ScenarioId("pkg.Test.test_x", ("a,b", "c"))
+        self.assertEqual(("a", "b", "c"), structured.components)
+
+    def test_seed(self):
+        structured = ScenarioId("pkg.Test.test_x").applied("a,b", 7).applied("c")
+        self.assertEqual(("a,b", "c"), structured.names)
+        self.assertEqual("pkg.Test.test_x(a,b)(c)(seed=7)", structured)
+        self.assertEqual(
+            parse_scenario_id("pkg.Test.test_x(a,b)(c)(seed=7)"), structured
+        )
+        self.assertEqual(("a", "b", "c"), structured.components)
+        self.assertEqual(7, structured.seed)
+        self.assertEqual("pkg.Test.test_x(a,b)(c)", structured.unseeded())
+        self.assertEqual(None, structured.unseeded().seed)
+
+    def test_names_with_parentheses_kept(self):
+        structured = ScenarioId("pkg.Test.test_x").applied("f(a)(b)")
+        self.assertEqual(("f(a)(b)",), structured.names)
+
+    def test_equality(self):
+        structured = ScenarioId("pkg.Test.test_x", ("a",))
+        self.assertEqual(ScenarioId("pkg.Test.test_x").applied("a"), structured)
+        self.assertEqual("pkg.Test.test_x(a)", structured)
+        self.assertEqual(hash("pkg.Test.test_x(a)"), hash(structured))
+        self.assertNotEqual(ScenarioId("pkg.Test.test_x(a)"), structured)
+
+
+class TestParseScenarioId(testtools.TestCase):
+    def test_plain_id(self):
+        self.assertEqual(
+            ScenarioId("pkg.Test.test_x", ()), parse_scenario_id("pkg.Test.test_x")
+        )
+
+    def test_scenarios(self):
+        parsed = parse_scenario_id("pkg.Test.test_x(a,b)(c)")
+        self.assertEqual("pkg.Test.test_x", parsed.base)
+        self.assertEqual(("a,b", "c"), parsed.names)
+
+    def test_nested_parentheses(self):
+        parsed = parse_scenario_id("pkg.Test.test_x(f(1),g)(h(2))")
+        self.assertEqual("pkg.Test.test_x", parsed.base)
+        self.assertEqual(("f(1),g", "h(2)"), parsed.names)
+
+    def test_round_trip(self):
+        structured = ScenarioId("pkg.Test.test_x", ("a", "b,c"))
+        self.assertEqual(structured, parse_scenario_id(str(structured)))
+
+
+class TestApplyScenarioIds(testtools.TestCase):
+    class ReferenceTest(unittest.TestCase):
+        def test_pass(self):
+            pass
+
+    def test_scenario_id_carried(self):
+        test = self.ReferenceTest("test_pass")
+        (scenario,) = multiply_scenarios([("a", {})], [("b", {})])
+        newtest = apply_scenario(("c", {}), apply_scenario(scenario, test))
+        structured = scenario_id(newtest)
+        self.assertIs(newtest.scenario_id, structured)
+        self.assertEqual(test.id(), structured.base)
+        self.assertEqual(("a,b", "c"), structured.names)
+        self.assertEqual(test.id() + "(a,b)(c)", newtest.id())
+
+    def test_scenario_id_of_other_tests_parsed(self):
+        test = self.ReferenceTest("test_pass")
+        self.assertEqual(ScenarioId(test.id()), scenario_id(test))
+
+    def test_stale_scenario_id_ignored(self):
+        newtest = apply_scenario(("a", {}), self.ReferenceTest("test_pass"))
+        newtest.id = lambda: "other(b)"
+        self.assertEqual(ScenarioId("other", ("b",)), scenario_id(newtest))
@@ -0,0 +1,82 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+import os
+import subprocess
+import sys
+
+import testtools
+
+import testscenarios
+
+# Importing testscenarios takes a few milliseconds; importing testtools or
+# running git on import costs tens of milliseconds more.
+IMPORT_BUDGET_MICROSECONDS = 50000
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_python(code):
+    """Run code in a fresh interpreter, returning (stdout, stderr)."""
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys; sys.path.insert(0, %r); %s" % (_ROOT, code),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return process.stdout, process.stderr
+
+
+class TestImport(testtools.TestCase):
+    def test_import_is_lazy(self):
+        stdout, _ = run_python(
+            "import testscenarios; "
+            "print(sorted(name for name in ('subprocess', 'testtools', "
+            "'testscenarios.scenarios', 'testscenarios.testcase') "
+            "if name in sys.modules))"
+        )
+        self.assertEqual("[]", stdout.strip())
+
+    def test_import_time_budget(self):
+        _, stderr = run_python("import testscenarios")
+        for line in stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == "testscenarios":
+                cumulative = int(fields[1])
+                break
+        else:
+            self.fail("no import time reported for testscenarios:\n" + stderr)
+        self.assertLess(cumulative, IMPORT_BUDGET_MICROSECONDS)
+
+    def test_names_resolved_on_use(self):
+        from testscenarios.scenarios import generate_scenarios
+        from testscenarios.testcase import TestWithScenarios
+
+        self.assertIs(generate_scenarios, testscenarios.generate_scenarios)
+        self.assertIs(TestWithScenarios, testscenarios.TestWithScenarios)
+        self.assertTrue(callable(testscenarios.shared))
+        self.assertIn("generate_scenarios", dir(testscenarios))
+        self.assertRaises(AttributeError, getattr, testscenarios, "nonexistent")
+
+    def test_version(self):
+        self.assertIsInstance(testscenarios.__version__, tuple)
+        self.assertIsInstance(testscenarios.version, str)
@@ -0,0 +1,192 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+import copy
+import hashlib
+import operator
+import sys
+import unittest
+
+import testtools
+
+from testscenarios.scenarios import (
+    apply_scenario,
+    apply_scenarios,
+    multiply_scenarios,
+)
+from testscenarios.parameters import CopyOnWrite, readonly, shared, shared_file
+from testscenarios.tests.test_scenarios import make_temp_path
+
+
+class TestShared(testtools.TestCase):
+    def test_buffer_reads_are_zero_copy(self):
+        payload = bytearray(b"abcdef")
+        view = shared(payload).view()
+        self.assertIsInstance(view, CopyOnWrite)
+        self.assertEqual(b"abc", bytes(view[:3]))
+        self.assertTrue(readonly(view).readonly)
+        payload[0:1] = b"z"
+        self.assertEqual(b"z", bytes(view[:1]))
+
+    def test_immutable_payload_is_given_as_is(self):
+        payload = b"hello world"
+        view = shared(payload).view()
+        self.assertIs(payload, view)
+        self.assertEqual(
+            hashlib.sha1(payload).hexdigest(), hashlib.sha1(view).hexdigest()
+        )
+
+    def test_buffer_has_bytes_methods(self):
+        view = shared(bytearray(b"hello world")).view()
+        self.assertIsInstance(view, CopyOnWrite)
+        self.assertEqual("hello world", view.decode())
+        self.assertTrue(view.startswith(b"hello"))
+        self.assertEqual([b"hello", b"world"], view.split())
+        self.assertIn(b"lo w", view)
+        self.assertNotIn(b"nope", view)
+        self.assertIn(ord("h"), view)
+
+    def test_buffer_operators(self):
+        param = shared(bytearray(b"ab"))
+        view = param.view()
+        self.assertEqual(b"abc", view + b"c")
+        self.assertEqual(b"abab", view * 2)
+        view *= 2
+        self.assertEqual(b"abab", bytes(view))
+        self.assertEqual(b"ab", bytes(param.view()))
+
+    def test_buffer_readonly_hashes(self):
+        view = shared(bytearray(b"hello")).view()
+        self.assertEqual(
+            hashlib.sha1(b"hello").hexdigest(),
+            hashlib.sha1(readonly(view)).hexdigest(),
+        )
+
+    @unittest.skipIf(sys.version_info < (3, 12), "needs __buffer__")
+    def test_buffer_protocol(self):
+        param = shared(bytearray(b"hello"))
+        view = param.view()
+        self.assertEqual(hashlib.sha1(b"hello").digest(), hashlib.sha1(view).digest())
+        memoryview(view)[0] = ord("j")
+        self.assertEqual(b"jello", bytes(view))
+        self.assertEqual(b"hello", bytes(param.view()))
+
+    def test_buffer_write_copies(self):
+        param = shared(bytearray(b"abcdef"))
+        first, second = param.view(), param.view()
+        first[0] = ord("z")
+        self.assertEqual(b"zbcdef", bytes(first))
+        self.assertEqual(b"abcdef", bytes(second))
+        self.assertIsInstance(readonly(first), bytearray)
+
+    def test_object_mutating_methods_copy(self):
+        param = shared({"a": [1, 2]})
+        first, second = param.view(), param.view()
+        first.update(b=3)
+        first["a"].append(3)
+        self.assertEqual({"a": [1, 2, 3], "b": 3}, readonly(first))
+        self.assertEqual({"a": [1, 2]}, second)
+
+    def test_nested_reads_are_private(self):
+        param = shared([[1], [2]])
+        first, second = param.view(), param.view()
+        first[0].append(3)
+        for item in first:
+            item.append(4)
+        self.assertEqual([[1, 3, 4], [2, 4]], first)
+        self.assertEqual([[1], [2]], second)
+        readonly(second)[1].append(5)
+        self.assertEqual([[1], [2]], param.view())
+
+    def test_flat_payload_reads_are_shared(self):
+        payload = [1, 2, 3]
+        view = shared(payload).view()
+        self.assertEqual(2, view[1])
+        self.assertEqual([1, 2, 3, 4], view + [4])
+        self.assertEqual((1, 2, 3), readonly(view))
+        self.assertIsNone(view._copy)
+
+    def test_readonly_does_not_expose_payload(self):
+        payload = {"a": 1}
+        view = shared(payload).view()
+        frozen = readonly(view)
+        self.assertEqual({"a": 1}, frozen)
+        self.assertRaises(TypeError, operator.setitem, frozen, "b", 2)
+
+    def test_inplace_operators_copy(self):
+        param = shared({1, 2})
+        view = param.view()
+        view |= {3}
+        self.assertEqual({1, 2, 3}, view)
+        self.assertEqual({1, 2}, param.view())
+        self.assertEqual({1, 2, 4}, param.view() | {4})
+
+    def test_inplace_add_copies(self):
+        param = shared([1])
+        view = param.view()
+        view += [2]
+        self.assertIsInstance(view, CopyOnWrite)
+        self.assertEqual([1, 2], view)
+        self.assertEqual([1], param.view())
+
+    def test_deepcopy_returns_private_payload(self):
+        param = shared(bytearray(b"abc"))
+        self.assertEqual(bytearray(b"abc"), copy.deepcopy(param.view()))
+
+    def test_shared_file_is_mapped(self):
+        path = make_temp_path(self, b"payload")
+        param = shared_file(path)
+        view = param.view()
+        self.assertEqual(b"pay", bytes(view[:3]))
+        self.assertTrue(view.startswith(b"pay"))
+        view[0] = ord("P")
+        self.assertEqual(b"Payload", bytes(view))
+        self.assertEqual(b"payload", bytes(param.view()))
+        with open(path, "rb") as f:
+            self.assertEqual(b"payload", f.read())
+
+    def test_shared_empty_file(self):
+        path = make_temp_path(self)
+        self.assertEqual(0, len(shared_file(path).view()))
+
+
+class TestSharedScenarios(testtools.TestCase):
+    class ReferenceTest(unittest.TestCase):
+        def test_pass(self):
+            pass
+
+    def test_each_test_gets_own_view(self):
+        payload = shared([1, 2, 3])
+        scenarios = multiply_scenarios(
+            [("data", {"data": payload})], [("a", {}), ("b", {})]
+        )
+        self.assertIs(payload, scenarios[0][1]["data"])
+        first, second = apply_scenarios(scenarios, self.ReferenceTest("test_pass"))
+        first.data.append(4)
+        self.assertEqual([1, 2, 3, 4], first.data)
+        self.assertEqual([1, 2, 3], second.data)
+
+    def test_layered_scenarios_get_own_views(self):
+        test = apply_scenario(
+            ("a", {"data": shared(bytearray(b"abc"))}),
+            self.ReferenceTest("test_pass"),
+        )
+        first, second = apply_scenarios([("x", {}), ("y", {})], test)
+        self.assertIsNot(first.data, second.data)
+        first.data[0] = ord("Z")
+        self.assertEqual(b"Zbc", bytes(first.data))
+        self.assertEqual(b"abc", bytes(second.data))
+        self.assertEqual(b"abc", bytes(test.data))
@@ -0,0 +1,140 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+
+import testtools
+
+from testscenarios.profiling import ScenarioProfiler
+from testscenarios.scenarios import generate_scenarios, multiply_scenarios
+from testscenarios.testcase import TestWithScenarios
+
+
+def query_sqlite():
+    return sum(range(1000))
+
+
+def query_postgres():
+    return sum(range(1000))
+
+
+def function_names(stats):
+    return {function[2] for function in stats.stats}
+
+
+class TestScenarioProfiler(testtools.TestCase):
+    class ReferenceTest(unittest.TestCase):
+        scenarios = multiply_scenarios(
+            [
+                ("sqlite", {"query": query_sqlite}),
+                ("postgres", {"query": query_postgres}),
+            ],
+            [("small", {}), ("large", {})],
+        )
+
+        def test_query(self):
+            self.query()
+
+    def run_profiled(self):
+        profiler = ScenarioProfiler()
+        result = unittest.TestResult()
+        unittest.TestSuite(
+            generate_scenarios(self.ReferenceTest("test_query"), profiler=profiler)
+        ).run(result)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(4, result.testsRun)
+        return profiler
+
+    def test_by_scenario(self):
+        by_scenario = self.run_profiled().by_scenario()
+        self.assertEqual(
+            {"sqlite,small", "sqlite,large", "postgres,small", "postgres,large"},
+            set(by_scenario),
+        )
+        self.assertIn("query_sqlite", function_names(by_scenario["sqlite,large"]))
+        self.assertNotIn("query_postgres", function_names(by_scenario["sqlite,large"]))
+
+    def test_by_dimension(self):
+        backends, sizes = self.run_profiled().by_dimension()
+        self.assertEqual({"sqlite", "postgres"}, set(backends))
+        self.assertEqual({"small", "large"}, set(sizes))
+        self.assertNotIn("query_sqlite", function_names(backends["postgres"]))
+        self.assertIn("query_sqlite", function_names(sizes["small"]))
+        self.assertIn("query_postgres", function_names(sizes["small"]))
+
+    def test_report(self):
+        stream = StringIO()
+        self.run_profiled().report(stream)
+        report = stream.getvalue()
+        self.assertIn("dimension 1\n", report)
+        self.assertIn("dimension 2\n", report)
+        self.assertIn("(query_sqlite)", report)
+        self.assertIn("(query_postgres)", report)
+
+    def test_dump(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.run_profiled().dump(directory)
+        self.assertEqual(
+            [
+                "postgres,large.prof",
+                "postgres,small.prof",
+                "sqlite,large.prof",
+                "sqlite,small.prof",
+            ],
+            sorted(os.listdir(directory)),
+        )
+
+    def test_scenario_profiler_attribute(self):
+        profiler = ScenarioProfiler()
+
+        class ProfiledTest(TestWithScenarios):
+            scenarios = self.ReferenceTest.scenarios
+            scenario_profiler = profiler
+
+            def test_query(self):
+                self.query()
+
+        result = unittest.TestResult()
+        ProfiledTest("test_query").run(result)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(4, result.testsRun)
+        self.assertEqual(4, len(profiler.by_scenario()))
+
+    def test_class_fixtures_run(self):
+        calls = []
+
+        class ReferenceTest(unittest.TestCase):
+            scenarios = [("1", {}), ("2", {})]
+
+            @classmethod
+            def setUpClass(cls):
+                calls.append("setUpClass")
+
+            def test_pass(self):
+                calls.append(type(self))
+
+        profiler = ScenarioProfiler()
+        result = unittest.TestResult()
+        tests = generate_scenarios(ReferenceTest("test_pass"), profiler=profiler)
+        unittest.TestSuite(tests).run(result)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(["setUpClass", ReferenceTest, ReferenceTest], calls)
+        self.assertEqual({"1", "2"}, set(profiler.by_scenario()))
@@ -0,0 +1,143 @@
+#  testscenarios: extensions to python unittest to allow declarative
+#  dependency injection ('scenarios') by tests.
+#
+# Copyright (c) 2009, Robert Collins <robertc@robertcollins.net>
+#
+# Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+# license at the users choice. A copy of both licenses are available in the
+# project source as Apache-2.0 and BSD. You may not use this file except in
+# compliance with one of these two licences.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# license you chose for the specific language governing permissions and
+# limitations under that license.
+
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import testtools
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE = """
+import unittest
+
+from testscenarios import (
+    TestWithScenarios,
+    load_tests_apply_scenarios,
+    per_module_scenarios,
+)
+
+load_tests = load_tests_apply_scenarios
+
+
+class TestBackends(TestWithScenarios):
+    scenarios = [("sqlite", {"backend": "sqlite"}), ("postgres", {"backend": "pg"})]
+
+    def test_query(self):
+        self.assertIn(self.backend, ("sqlite", "pg"))
+
+    def test_sqlite_only(self):
+        self.assertEqual("sqlite", self.backend)
+
+
+class TestModules(unittest.TestCase):
+    scenarios = per_module_scenarios(
+        "module", [("json", "json"), ("missing", "no_such_module")], "test"
+    )
+
+    def test_loads(self):
+        self.assertEqual([], self.module.loads("[]"))
+
+
+class TestClassFixtures(TestWithScenarios):
+    scenarios = [("a", {}), ("b", {})]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.calls = ["setUpClass"]
+
+    @classmethod
+    def tearDownClass(cls):
+        assert cls.calls == ["setUpClass", "test_fixture", "test_fixture"]
+        super().tearDownClass()
+
+    def test_fixture(self):
+        self.assertEqual("setUpClass", self.calls[0], "setUpClass not run")
+        self.calls.append("test_fixture")
+
+
+class TestPlain(unittest.TestCase):
+    def test_plain(self):
+        pass
+"""
+
+
+@unittest.skipUnless(importlib.util.find_spec("pytest"), "pytest not installed")
+class TestPytestPlugin(testtools.TestCase):
+    def run_pytest(self, *args, items=True):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, "test_sample.py"), "w") as f:
+            f.write(SAMPLE)
+        environ = dict(os.environ)
+        environ["PYTHONPATH"] = _ROOT
+        # Load only this plugin, whether or not testscenarios is installed.
+        environ["PYTEST_DISABLE_PLUGIN_AUTOLOAD"] = "1"
+        if items:
+            args += ("-o", "testscenarios_items=true")
+        process = subprocess.run(
+            [sys.executable, "-m", "pytest", "-p", "testscenarios.pytest_plugin"]
+            + ["-p", "no:cacheprovider", "-q", "-rfEs", "test_sample.py"]
+            + list(args),
+            capture_output=True,
+            cwd=directory,
+            env=environ,
+            text=True,
+        )
+        return process.stdout
+
+    def test_collects_item_per_scenario(self):
+        output = self.run_pytest("--collect-only")
+        self.assertEqual(
+            [
+                "test_sample.py::TestBackends::test_query(sqlite)",
+                "test_sample.py::TestBackends::test_query(postgres)",
+                "test_sample.py::TestBackends::test_sqlite_only(sqlite)",
+                "test_sample.py::TestBackends::test_sqlite_only(postgres)",
+                "test_sample.py::TestModules::test_loads(json)",
+                "test_sample.py::TestModules::test_loads(missing)",
+                "test_sample.py::TestClassFixtures::test_fixture(a)",
+                "test_sample.py::TestClassFixtures::test_fixture(b)",
+                "test_sample.py::TestPlain::test_plain",
+            ],
+            [line for line in output.splitlines() if "::" in line],
+        )
+
+    def test_select_by_scenario(self):
+        output = self.run_pytest("--collect-only", "-k", "postgres")
+        self.assertIn("2/9 tests collected", output)
+
+    def test_outcomes(self):
+        output = self.run_pytest()
+        self.assertIn(
+            "FAILED test_sample.py::TestBackends::test_sqlite_only(postgres)", output
+        )
+        self.assertIn("AssertionError: 'sqlite' != 'pg'", output)
+        self.assertIn("no_such_module unavailable", output)
+        self.assertIn("1 failed, 7 passed, 1 skipped", output)
+        self.assertNotIn("setUpClass not run", output)
+        self.assertNotIn("error", output)
+
+    def test_off_by_default(self):
+        output = self.run_pytest("--collect-only", items=False)
+        self.assertIn("test_sample.py::TestBackends::test_query\n", output)
+        self.assertNotIn("(sqlite)", output)
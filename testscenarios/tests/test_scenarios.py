@@ -15,23 +15,70 @@
 # license you chose for the specific language governing permissions and
 # limitations under that license.
 
+import gc
+import os
+import tempfile
+import threading
 import unittest
+import weakref
+from collections import Counter
 
 import testtools
-from testtools.matchers import EndsWith
+from testtools.matchers import EndsWith, StartsWith
 from typing import cast
 
 
 import testscenarios
+from testscenarios.budget import ScenarioHistory
 from testscenarios.scenarios import (
+    ExtendedScenarios,
+    ScenarioTable,
+    UnavailableModule,
+    UnavailableScenarioTest,
     apply_scenario,
     apply_scenarios,
+    deduplicate_scenarios,
     generate_scenarios,
     load_tests_apply_scenarios,
     multiply_scenarios,
+    per_module_scenarios,
+    sample_multiply_scenarios,
+    sample_scenarios,
+    write_scenario_table,
 )
 
 
+def make_temp_path(test, content=None, exists=True):
+    """Return a temporary file path that is removed when ``test`` finishes.
+
+    :param content: Bytes to write to the file, if any.
+    :param exists: If False the file is removed again so the code under test
+        has to create it.
+    """
+    fd, path = tempfile.mkstemp()
+    if content is not None:
+        os.write(fd, content)
+    os.close(fd)
+    if not exists:
+        os.unlink(path)
+    test.addCleanup(os.unlink, path)
+    return path
+
+
+class CopyCountingTest(unittest.TestCase):
+    """A test case recording every ``copy.copy`` of itself in ``copies``."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.copies = []
+
+    def __copy__(self):
+        self.copies.append(self)
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        return new
+
+
 class TestGenerateScenarios(testtools.TestCase):
     def hook_apply_scenarios(self):
         self.addCleanup(
@@ -246,6 +293,265 @@ class TestMultiplyScenarios(testtools.TestCase):
         self.assertEqual("a,a,a,a", scenarios[0][0])
 
 
+class TestExtendedScenarios(testtools.TestCase):
+    backends = [("sqlite", {"backend": "sqlite"}), ("postgres", {"backend": "pg"})]
+
+    def connections(self, parameters):
+        if parameters["backend"] == "sqlite":
+            return [("memory", {"dsn": "sqlite://"})]
+        return [("tcp", {"dsn": "pg://host"}), ("unix", {"dsn": "pg:///tmp"})]
+
+    def test_extended_by_function(self):
+        self.assertEqual(
+            [
+                ("sqlite,memory", {"backend": "sqlite", "dsn": "sqlite://"}),
+                ("postgres,tcp", {"backend": "pg", "dsn": "pg://host"}),
+                ("postgres,unix", {"backend": "pg", "dsn": "pg:///tmp"}),
+            ],
+            list(ExtendedScenarios(self.backends, self.connections)),
+        )
+
+    def test_extended_by_scenarios(self):
+        self.assertEqual(
+            multiply_scenarios(self.backends, [("a", {"a": 1}), ("b", {"b": 2})]),
+            list(ExtendedScenarios(self.backends, [("a", {"a": 1}), ("b", {"b": 2})])),
+        )
+
+    def test_nested(self):
+        def sizes(parameters):
+            yield ("small", {"size": len(parameters["dsn"])})
+
+        scenarios = ExtendedScenarios(self.backends, self.connections, sizes)
+        self.assertEqual(3, len(list(scenarios)))
+        self.assertEqual(
+            ("postgres,unix,small", {"backend": "pg", "dsn": "pg:///tmp", "size": 9}),
+            list(scenarios)[-1],
+        )
+
+    def test_lazy(self):
+        calls = []
+
+        def extension(parameters):
+            calls.append(parameters)
+            return []
+
+        scenarios = ExtendedScenarios(self.backends, extension)
+        self.assertEqual([], calls)
+        self.assertFalse(scenarios)
+        self.assertEqual([], list(scenarios))
+        self.assertTrue(ExtendedScenarios(self.backends, self.connections))
+
+    def test_materialised_in_one_walk(self):
+        calls = []
+
+        def extension(parameters):
+            calls.append(parameters["backend"])
+            return self.connections(parameters)
+
+        self.assertEqual(3, len(tuple(ExtendedScenarios(self.backends, extension))))
+        self.assertEqual(["sqlite", "pg"], calls)
+
+    def test_clones_each_test_once(self):
+        class ReferenceTest(CopyCountingTest):
+            scenarios = ExtendedScenarios(self.backends, self.connections)
+
+            def test_one(self):
+                pass
+
+            def test_two(self):
+                pass
+
+        suite = unittest.TestSuite(
+            [ReferenceTest("test_one"), ReferenceTest("test_two")]
+        )
+        tests = list(generate_scenarios(suite))
+        self.assertEqual(6, len(tests))
+        self.assertEqual(6, len(ReferenceTest.copies))
+        self.assertThat(tests[-1].id(), EndsWith("test_two(postgres,unix)"))
+        self.assertEqual("pg:///tmp", tests[-1].dsn)
+
+
+class TestDeduplicateScenarios(testtools.TestCase):
+    def test_equal_parameters(self):
+        scenarios = deduplicate_scenarios(
+            multiply_scenarios(
+                [("a", {"x": 1}), ("b", {"x": 1, "y": 2})],
+                [("c", {"y": 2}), ("d", {"y": 3})],
+            )
+        )
+        self.assertEqual(
+            [("a,c", {"x": 1, "y": 2}), ("a,d", {"x": 1, "y": 3})], scenarios
+        )
+        self.assertEqual({"a,c": ["b,c"], "a,d": ["b,d"]}, scenarios.aliases)
+        self.assertEqual(4, scenarios.original_count)
+        self.assertEqual(2, scenarios.removed)
+        self.assertEqual(
+            "deduplicated 4 scenarios to 2, removing 2", scenarios.report()
+        )
+
+    def test_types_distinguished(self):
+        scenarios = deduplicate_scenarios([("a", {"x": 1}), ("b", {"x": True})])
+        self.assertEqual(2, len(scenarios))
+
+    def test_unhashable_by_identity(self):
+        payload = [1, 2]
+        scenarios = deduplicate_scenarios(
+            [("a", {"x": payload}), ("b", {"x": payload}), ("c", {"x": [1, 2]})]
+        )
+        self.assertEqual(["a", "c"], [name for name, _ in scenarios])
+        self.assertEqual({"a": ["b"]}, scenarios.aliases)
+
+    def test_irrelevant_when(self):
+        scenarios = deduplicate_scenarios(
+            multiply_scenarios(
+                [("sqlite", {"backend": "sqlite"}), ("pg", {"backend": "pg"})],
+                [("small", {"pool": 1}), ("large", {"pool": 10})],
+            ),
+            irrelevant_when={"pool": lambda p: p["backend"] == "sqlite"},
+        )
+        self.assertEqual(
+            ["sqlite,small", "pg,small", "pg,large"], [name for name, _ in scenarios]
+        )
+        self.assertEqual({"sqlite,small": ["sqlite,large"]}, scenarios.aliases)
+
+    def test_key(self):
+        scenarios = deduplicate_scenarios(
+            [("a", {"dsn": "HOST"}), ("b", {"dsn": "host"})],
+            key=lambda p: p["dsn"].lower(),
+        )
+        self.assertEqual([("a", {"dsn": "HOST"})], scenarios)
+
+    def test_saved_time(self):
+        history = ScenarioHistory()
+        history.record("pkg.Test.test_x(a,c)", 1.0, False)
+        history.record("pkg.Test.test_x(b,c)", 2.0, False)
+        history.record("pkg.Test.test_y(b,c)", 0.5, False)
+        scenarios = deduplicate_scenarios([("a,c", {}), ("b,c", {})])
+        self.assertEqual(2.5, scenarios.saved_time(history))
+        self.assertEqual(
+            "deduplicated 2 scenarios to 1, removing 1 (saving about 2.5s)",
+            scenarios.report(history),
+        )
+
+
+class TestSampleScenarios(testtools.TestCase):
+    population = [(str(i), {"i": i}) for i in range(20)]
+
+    def test_no_size_returns_everything(self):
+        self.assertEqual(self.population, sample_scenarios(self.population))
+        self.assertEqual(self.population, sample_scenarios(self.population, count=30))
+
+    def test_count(self):
+        sample = sample_scenarios(self.population, count=5, seed=42)
+        self.assertEqual(5, len(sample))
+        self.assertEqual([42] * 5, [params["scenario_seed"] for _, params in sample])
+        names = {name for name, _ in self.population}
+        self.assertTrue(names.issuperset(name for name, _ in sample))
+        indices = [parameters["i"] for _, parameters in sample]
+        self.assertEqual(sorted(indices), indices)
+
+    def test_seed_kept_out_of_names(self):
+        class ReferenceTest(unittest.TestCase):
+            def test_pass(self):
+                pass
+
+        sample = sample_scenarios(self.population, count=1, seed=42)
+        test = apply_scenario(sample[0], ReferenceTest("test_pass"))
+        name = sample[0][1]["i"]
+        self.assertThat(test.id(), EndsWith("test_pass(%d)(seed=42)" % name))
+        self.assertEqual((str(name),), test.scenario_id.components)
+        self.assertThat(str(test.scenario_id.unseeded()), EndsWith("(%d)" % name))
+
+    def test_seed_survives_composition(self):
+        class ReferenceTest(unittest.TestCase):
+            def test_pass(self):
+                pass
+
+        sample = sample_scenarios(self.population, count=2, seed=1)
+        combined = multiply_scenarios(sample, [("x", {})])
+        self.assertEqual(
+            ["%s,x" % name for name, _ in sample], [name for name, _ in combined]
+        )
+        test = apply_scenario(combined[0], ReferenceTest("test_pass"))
+        self.assertThat(test.id(), EndsWith("(%s)(seed=1)" % combined[0][0]))
+        self.assertEqual((sample[0][0], "x"), test.scenario_id.components)
+
+    def test_fraction(self):
+        sample = sample_scenarios(iter(self.population), fraction=0.25, seed=1)
+        self.assertEqual(5, len(sample))
+
+    def test_reproducible(self):
+        self.assertEqual(
+            sample_scenarios(self.population, count=5, seed=7),
+            sample_scenarios(self.population, count=5, seed=7),
+        )
+
+    def test_seed_from_environment(self):
+        self.addCleanup(os.environ.pop, "TESTSCENARIOS_SEED", None)
+        os.environ["TESTSCENARIOS_SEED"] = "3"
+        self.assertEqual(
+            sample_scenarios(self.population, count=5, seed=3),
+            sample_scenarios(self.population, count=5),
+        )
+
+    def test_count_and_fraction(self):
+        self.assertRaises(
+            ValueError, sample_scenarios, self.population, count=1, fraction=0.5
+        )
+
+
+class TestSampleMultiplyScenarios(testtools.TestCase):
+    def factory(self, name, values):
+        return [(value, {name: value}) for value in values]
+
+    def test_no_size_is_multiply_scenarios(self):
+        dimensions = (self.factory("p", "ab"), self.factory("q", "xyz"))
+        self.assertEqual(
+            multiply_scenarios(*dimensions), sample_multiply_scenarios(*dimensions)
+        )
+
+    def test_sample_is_subset_of_product(self):
+        dimensions = (self.factory("p", "abcd"), self.factory("q", "wxyz"))
+        product = dict(multiply_scenarios(*dimensions))
+        sample = sample_multiply_scenarios(*dimensions, count=6, seed=5)
+        self.assertEqual(6, len(sample))
+        self.assertEqual(6, len({name for name, _ in sample}))
+        for name, parameters in sample:
+            self.assertEqual(5, parameters.pop("scenario_seed"))
+            self.assertEqual(product[name], parameters)
+
+    def test_stratified_covers_every_dimension(self):
+        dimensions = (
+            self.factory("p", "abcdef"),
+            self.factory("q", "xy"),
+            self.factory("r", "0123"),
+        )
+        for seed in range(20):
+            sample = sample_multiply_scenarios(
+                *dimensions, count=6, seed=seed, stratified=True
+            )
+            self.assertEqual(6, len(sample))
+            for key, values in (("p", "abcdef"), ("q", "xy"), ("r", "0123")):
+                self.assertEqual(
+                    set(values), {parameters[key] for _, parameters in sample}
+                )
+
+    def test_stratified_small_sample_covers_small_dimensions(self):
+        dimensions = (self.factory("p", "ab"), self.factory("q", map(str, range(100))))
+        for seed in range(20):
+            sample = sample_multiply_scenarios(
+                *dimensions, count=4, seed=seed, stratified=True
+            )
+            self.assertEqual({"a", "b"}, {parameters["p"] for _, parameters in sample})
+
+    def test_reproducible(self):
+        dimensions = (self.factory("p", "abcd"), self.factory("q", "wxyz"))
+        self.assertEqual(
+            sample_multiply_scenarios(*dimensions, fraction=0.5, seed=9),
+            sample_multiply_scenarios(*dimensions, fraction=0.5, seed=9),
+        )
+
+
 class TestPerModuleScenarios(testtools.TestCase):
     def test_per_module_scenarios(self):
         """Generate scenarios for available modules"""
@@ -268,3 +574,360 @@ class TestPerModuleScenarios(testtools.TestCase):
                 ("nonexistent", {"the_module": None}),
             ],
         )
+
+    def make_suite(self, skip_unavailable):
+        class ReferenceTest(CopyCountingTest):
+            scenarios = per_module_scenarios(
+                "the_module",
+                [("unittest", "unittest"), ("nonexistent", "nonexistent")],
+                skip_unavailable=skip_unavailable,
+            )
+
+            def test_one(self):
+                pass
+
+            def test_two(self):
+                pass
+
+        suite = unittest.TestSuite(
+            [ReferenceTest("test_one"), ReferenceTest("test_two")]
+        )
+        return suite, ReferenceTest.copies
+
+    def test_unavailable_module_is_exc_info(self):
+        ((_, parameters),) = per_module_scenarios(
+            "the_module", [("nonexistent", "nonexistent")], skip_unavailable="test"
+        )
+        module = parameters["the_module"]
+        self.assertIsInstance(module, UnavailableModule)
+        self.assertIsInstance(module, tuple)
+        self.assertTrue(issubclass(module[0], ImportError))
+        self.assertThat(
+            module.reason,
+            StartsWith("nonexistent unavailable: ModuleNotFoundError: "),
+        )
+
+    def test_invalid_skip_unavailable(self):
+        self.assertRaises(
+            ValueError, per_module_scenarios, "the_module", [], skip_unavailable="x"
+        )
+
+    def test_skip_each_test(self):
+        suite, copies = self.make_suite("test")
+        tests = list(generate_scenarios(suite))
+        self.assertEqual(4, len(copies))
+        self.assertEqual(
+            [
+                "test_one(unittest)",
+                "test_one(nonexistent)",
+                "test_two(unittest)",
+                "test_two(nonexistent)",
+            ],
+            [test.id().rsplit(".", 1)[1] for test in tests],
+        )
+        self.assertEqual({type(suite._tests[0])}, {type(test) for test in tests})
+        result = unittest.TestResult()
+        unittest.TestSuite(tests).run(result)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(4, result.testsRun)
+        self.assertEqual(
+            ["test_one(nonexistent)", "test_two(nonexistent)"],
+            [test.id().rsplit(".", 1)[1] for test, _ in result.skipped],
+        )
+        self.assertIn("nonexistent unavailable", result.skipped[0][1])
+
+    def test_skip_each_test_runs_class_fixtures_once(self):
+        calls = []
+
+        class ReferenceTest(unittest.TestCase):
+            scenarios = per_module_scenarios(
+                "the_module",
+                [("unittest", "unittest"), ("nonexistent", "nonexistent")],
+                skip_unavailable="test",
+            )
+
+            @classmethod
+            def setUpClass(cls):
+                calls.append("setUpClass")
+
+            @classmethod
+            def tearDownClass(cls):
+                calls.append("tearDownClass")
+
+            def test_one(self):
+                pass
+
+            def test_two(self):
+                pass
+
+            def test_three(self):
+                pass
+
+        suite = unittest.TestLoader().loadTestsFromTestCase(ReferenceTest)
+        result = unittest.TestResult()
+        unittest.TestSuite(generate_scenarios(suite)).run(result)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(6, result.testsRun)
+        self.assertEqual(3, len(result.skipped))
+        self.assertEqual(["setUpClass", "tearDownClass"], calls)
+
+    def test_skip_each_scenario(self):
+        suite, copies = self.make_suite("scenario")
+        tests = list(generate_scenarios(suite))
+        self.assertEqual(3, len(tests))
+        self.assertEqual(2, len(copies))
+        placeholder = tests[-1]
+        self.assertIsInstance(placeholder, UnavailableScenarioTest)
+        self.assertEqual(("nonexistent",), placeholder.scenario_id.names)
+        self.assertEqual(2, len(placeholder.skipped_ids))
+        result = unittest.TestResult()
+        placeholder.run(result)
+        self.assertEqual(1, result.testsRun)
+        ((test, reason),) = result.skipped
+        self.assertIs(placeholder, test)
+        self.assertThat(reason, EndsWith("(2 tests)"))
+
+    def test_skip_each_scenario_single_test(self):
+        suite, _ = self.make_suite("scenario")
+        test = next(iter(suite))
+        tests = list(generate_scenarios(test))
+        self.assertEqual(2, len(tests))
+        placeholder = tests[-1]
+        self.assertEqual(test.id() + "(nonexistent)", placeholder.id())
+        result = unittest.TestResult()
+        placeholder.run(result)
+        ((_, reason),) = result.skipped
+        self.assertNotIn("tests)", reason)
+
+    def test_skip_each_scenario_per_class(self):
+        first, _ = self.make_suite("scenario")
+        second, _ = self.make_suite("scenario")
+        tests = list(generate_scenarios(unittest.TestSuite([first, second])))
+        placeholders = tests[-2:]
+        self.assertEqual(
+            [2, 2], [len(placeholder.skipped_ids) for placeholder in placeholders]
+        )
+
+
+class TestScenarioTable(testtools.TestCase):
+    def make_table(self, scenarios):
+        path = make_temp_path(self)
+        write_scenario_table(path, scenarios)
+        table = ScenarioTable(path)
+        self.addCleanup(table.close)
+        return table
+
+    def test_round_trip(self):
+        scenarios = [
+            ("one", {"input": 1, "expected": [1]}),
+            ("tw\xf6", {"input": "2", "expected": None}),
+        ]
+        table = self.make_table(scenarios)
+        self.assertEqual(2, len(table))
+        self.assertEqual(scenarios, list(table))
+        self.assertEqual(scenarios[1], table[-1])
+        self.assertEqual(scenarios[1:], table[1:])
+        self.assertEqual("tw\xf6", table.name(1))
+        self.assertRaises(IndexError, table.__getitem__, 2)
+
+    def test_empty_table(self):
+        table = self.make_table([])
+        self.assertEqual(0, len(table))
+        self.assertFalse(table)
+
+    def test_not_a_table(self):
+        path = make_temp_path(self, b"not a scenario table")
+        self.assertRaises(ValueError, len, ScenarioTable(path))
+
+    def test_short_file(self):
+        path = make_temp_path(self, b"short")
+        self.assertRaises(ValueError, len, ScenarioTable(path))
+
+    def test_truncated_table(self):
+        table = self.make_table([("one", {"input": 1}), ("two", {"input": 2})])
+        with open(table.path, "rb") as f:
+            data = f.read()
+        for size in (len(data) - 5, 20):
+            with open(table.path, "wb") as f:
+                f.write(data[:size])
+            truncated = ScenarioTable(table.path)
+            self.addCleanup(truncated.close)
+            self.assertRaises(ValueError, list, truncated)
+
+    def test_lazy(self):
+        table = ScenarioTable("/nonexistent/path")
+        self.assertEqual("/nonexistent/path", table.path)
+
+    def test_generate_scenarios(self):
+        class ReferenceTest(unittest.TestCase):
+            scenarios = self.make_table([("a", {"foo": 1}), ("b", {"foo": 2})])
+
+            def test_pass(self):
+                pass
+
+        tests = list(generate_scenarios(ReferenceTest("test_pass")))
+        self.assertEqual([1, 2], [test.foo for test in tests])
+        self.expectThat(tests[1].id(), EndsWith("ReferenceTest.test_pass(b)"))
+
+
+class TestConcurrentExpansion(testtools.TestCase):
+    threads = 16
+
+    def make_classes(self, path):
+        write_scenario_table(path, [("row%d" % i, {"row": i}) for i in range(20)])
+
+        class ListTest(unittest.TestCase):
+            scenarios = multiply_scenarios(
+                [("a", {}), ("b", {}), ("c", {})], [("x", {}), ("y", {})]
+            )
+
+            def test_one(self):
+                self.addCleanup(lambda: None)
+
+            def test_two(self):
+                pass
+
+        class GeneratorTest(unittest.TestCase):
+            scenarios = (("g%d" % i, {"value": i}) for i in range(10))
+
+            def test_one(self):
+                pass
+
+            def test_two(self):
+                pass
+
+        class TableTest(unittest.TestCase):
+            scenarios = ScenarioTable(path)
+
+            def test_one(self):
+                pass
+
+        class MixinTest(testscenarios.TestWithScenarios):
+            scenarios = [("m%d" % i, {}) for i in range(5)]
+
+            def test_one(self):
+                pass
+
+        return [ListTest, GeneratorTest, TableTest, MixinTest]
+
+    def test_expand_from_many_threads(self):
+        path = make_temp_path(self)
+        classes = self.make_classes(path)
+        self.addCleanup(classes[2].scenarios.close)
+        loader = unittest.TestLoader()
+        shared = loader.suiteClass(map(loader.loadTestsFromTestCase, classes))
+        barrier = threading.Barrier(self.threads)
+        expanded = [None] * self.threads
+        errors = []
+
+        def expand(index):
+            try:
+                barrier.wait()
+                # Half the threads share test objects, the others load their
+                # own from the same classes.
+                if index % 2:
+                    suite = shared
+                else:
+                    suite = loader.suiteClass(
+                        map(loader.loadTestsFromTestCase, classes)
+                    )
+                expanded[index] = list(generate_scenarios(suite))
+            except BaseException as e:
+                errors.append(e)
+
+        workers = [
+            threading.Thread(target=expand, args=(index,))
+            for index in range(self.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([], errors)
+        expected = Counter(test.id() for test in expanded[0])
+        # 12 list, 20 generator, 20 table and 5 mixin tests.
+        self.assertEqual(57, len(expected))
+        self.assertEqual({1}, set(expected.values()))
+        for tests in expanded[1:]:
+            self.assertEqual(expected, Counter(test.id() for test in tests))
+        cleanups = [
+            id(test._cleanups)
+            for tests in expanded
+            for test in tests
+            if isinstance(test, unittest.TestCase)
+        ]
+        self.assertEqual(len(cleanups), len(set(cleanups)))
+
+    def test_generator_read_once_without_keeping_classes(self):
+        class GeneratorTest(unittest.TestCase):
+            scenarios = (("g%d" % i, {}) for i in range(3))
+
+            def test_one(self):
+                pass
+
+        self.assertEqual(3, len(list(generate_scenarios(GeneratorTest("test_one")))))
+        self.assertEqual(3, len(list(generate_scenarios(GeneratorTest("test_one")))))
+        self.assertIsInstance(GeneratorTest.scenarios, tuple)
+        test_class = weakref.ref(GeneratorTest)
+        del GeneratorTest
+        gc.collect()
+        self.assertIsNone(test_class())
+
+    def test_extensions_run_outside_lock(self):
+        # Each call waits for a call on the other thread, so expansion only
+        # completes if the threads run the extension at the same time.
+        barrier = threading.Barrier(2, timeout=10)
+
+        def extension(parameters):
+            barrier.wait()
+            return [("x", {})]
+
+        class ExtendedTest(unittest.TestCase):
+            scenarios = ExtendedScenarios([("a", {}), ("b", {})], extension)
+
+            def test_one(self):
+                pass
+
+        expanded = []
+        errors = []
+
+        def expand():
+            try:
+                expanded.append(list(generate_scenarios(ExtendedTest("test_one"))))
+            except BaseException as e:
+                errors.append(e)
+
+        workers = [threading.Thread(target=expand) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([], errors)
+        self.assertEqual([2, 2], [len(tests) for tests in expanded])
+
+    def test_clones_run_concurrently(self):
+        path = make_temp_path(self)
+        ListTest = self.make_classes(path)[0]
+        tests = list(generate_scenarios(ListTest("test_one")))
+        result = unittest.TestResult()
+        workers = [threading.Thread(target=test.run, args=(result,)) for test in tests]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([], result.errors)
+        self.assertEqual(6, result.testsRun)
+
+    def test_parameters_keep_identity(self):
+        config = {"backend": "sqlite"}
+        handlers = []
+
+        class ReferenceTest(unittest.TestCase):
+            def test_pass(self):
+                pass
+
+        test = apply_scenario(("a", {"config": config}), ReferenceTest("test_pass"))
+        test.handlers = handlers
+        test = apply_scenario(("b", {}), test)
+        self.assertIs(config, test.config)
+        self.assertIs(handlers, test.handlers)